@@ -0,0 +1,543 @@
+#!/usr/bin/env python
+"""
+Local stand-in for the Shopify Admin REST API, used by the benchmarks.
+
+It serves the endpoints the server uses, with cursor paging through
+page_info Link headers, X-Shopify-Shop-Api-Call-Limit headers from a leaky
+bucket, and optional injected latency and 429 responses.
+
+The GraphQL endpoint handles the bulk operations of export_catalog: a bulk
+query runs for a fixed time and then serves its result as a JSONL file.
+GraphQL requests draw on their own cost bucket, as they do on Shopify, and
+report it in extensions.cost.
+
+Run it on its own with:
+
+    python benchmarks/mock_shopify.py --port 8765 --products 2000
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from aiohttp import web
+
+API_PREFIX = "/admin/api/{version}"
+
+# Products are created one hour apart from this moment on
+CATALOG_START = datetime(2023, 1, 1, tzinfo=timezone.utc)
+
+# Query filters kept in page_info cursors
+FILTERS = ("since_id", "updated_at_min", "created_at_min", "created_at_max", "ids")
+
+# Points every GraphQL request costs
+GRAPHQL_QUERY_COST = 10
+
+
+def make_product(product_id):
+    """Build a product resource with three variants, an option and an image"""
+    return {
+        "id": product_id,
+        "title": f"Product {product_id}",
+        "body_html": f"<p>Description of product {product_id}</p>",
+        "vendor": f"Vendor {product_id % 7}",
+        "product_type": f"Type {product_id % 5}",
+        "handle": f"product-{product_id}",
+        "status": "active" if product_id % 4 else "draft",
+        "tags": "sale, summer" if product_id % 3 == 0 else "winter",
+        "created_at": (CATALOG_START + timedelta(hours=product_id)).isoformat(),
+        "updated_at": f"2024-02-{1 + product_id % 28:02d}T00:00:00+00:00",
+        "variants": [
+            {
+                "id": product_id * 100 + position,
+                "product_id": product_id,
+                "title": f"Size {position}",
+                "price": f"{10 + position}.00",
+                "sku": f"SKU-{product_id}-{position}",
+                "position": position,
+                "inventory_quantity": 10 * position,
+                "option1": f"Size {position}",
+                "option2": None,
+                "option3": None,
+            }
+            for position in (1, 2, 3)
+        ],
+        "options": [
+            {
+                "id": product_id * 10,
+                "product_id": product_id,
+                "name": "Size",
+                "position": 1,
+                "values": ["Size 1", "Size 2", "Size 3"],
+            }
+        ],
+        "images": [
+            {
+                "id": product_id * 1000,
+                "product_id": product_id,
+                "position": 1,
+                "src": f"https://cdn.example.com/products/{product_id}.png",
+                "alt": None,
+            }
+        ],
+    }
+
+
+def gid(resource, object_id):
+    return f"gid://shopify/{resource}/{object_id}"
+
+
+def bulk_records(product):
+    """Yield the JSONL records of a product and its variants, as a bulk query returns them"""
+    product_gid = gid("Product", product["id"])
+    yield {
+        "id": product_gid,
+        "title": product["title"],
+        "handle": product["handle"],
+        "vendor": product["vendor"],
+        "productType": product["product_type"],
+        "status": product["status"].upper(),
+        "tags": [tag.strip() for tag in product["tags"].split(",") if tag.strip()],
+        "createdAt": product["created_at"],
+        "updatedAt": product["updated_at"],
+    }
+    for variant in product.get("variants", []):
+        yield {
+            "id": gid("ProductVariant", variant["id"]),
+            "title": variant["title"],
+            "sku": variant["sku"],
+            "price": variant["price"],
+            "inventoryQuantity": variant["inventory_quantity"],
+            "__parentId": product_gid,
+        }
+
+
+def encode_page_info(state):
+    return base64.urlsafe_b64encode(json.dumps(state).encode()).decode().rstrip("=")
+
+
+def decode_page_info(page_info):
+    padding = "=" * (-len(page_info) % 4)
+    return json.loads(base64.urlsafe_b64decode(page_info + padding))
+
+
+def project(product, fields):
+    if not fields:
+        return product
+    names = fields.split(",")
+    return {name: value for name, value in product.items() if name in names}
+
+
+class MockShopify:
+    """
+    In-memory store behind the mock API
+
+    Parameters:
+    products (int): Number of products in the catalog
+    latency (float): Seconds added to every response
+    jitter (float): Maximum random seconds added on top of latency
+    throttle_rate (float): Share of requests answered with 429 regardless of the bucket
+    bucket_size (int): Size of the call-limit bucket
+    leak_rate (float): Calls per second leaking out of the bucket
+    graphql_bucket_size (int): Points in the GraphQL cost bucket
+    graphql_restore_rate (float): Points per second restored to the GraphQL cost bucket
+    bulk_duration (float): Seconds a bulk query runs before it completes
+    seed (int): Seed of the random generator, for repeatable runs
+    """
+
+    def __init__(
+        self,
+        products=1000,
+        latency=0.0,
+        jitter=0.0,
+        throttle_rate=0.0,
+        bucket_size=1000,
+        leak_rate=500.0,
+        graphql_bucket_size=1000,
+        graphql_restore_rate=50.0,
+        bulk_duration=1.0,
+        seed=0,
+    ):
+        self.products = {
+            product_id: make_product(product_id) for product_id in range(1, products + 1)
+        }
+        self.next_id = products + 1
+        self.latency = latency
+        self.jitter = jitter
+        self.throttle_rate = throttle_rate
+        self.bucket_size = bucket_size
+        self.leak_rate = leak_rate
+        self.random = random.Random(seed)
+        self.level = 0.0
+        self.updated_at = time.monotonic()
+        self.calls = {}
+        self.throttled = 0
+        self.graphql_bucket_size = graphql_bucket_size
+        self.graphql_restore_rate = graphql_restore_rate
+        self.graphql_available = float(graphql_bucket_size)
+        self.graphql_updated_at = time.monotonic()
+        self.bulk_duration = bulk_duration
+        self.bulk_operations = {}
+        self.bulk_results = {}
+
+    def reserve(self):
+        """Take a call from the bucket; False if the bucket is full"""
+        now = time.monotonic()
+        self.level = max(self.level - (now - self.updated_at) * self.leak_rate, 0.0)
+        self.updated_at = now
+        if self.level + 1 > self.bucket_size:
+            return False
+        self.level += 1
+        return True
+
+    def drain_time(self):
+        """Seconds until the bucket is empty again"""
+        level = max(self.level - (time.monotonic() - self.updated_at) * self.leak_rate, 0.0)
+        return level / self.leak_rate
+
+    def reserve_graphql(self, cost):
+        """Take points from the GraphQL cost bucket; False if not enough are left"""
+        now = time.monotonic()
+        self.graphql_available = min(
+            self.graphql_available + (now - self.graphql_updated_at) * self.graphql_restore_rate,
+            self.graphql_bucket_size,
+        )
+        self.graphql_updated_at = now
+        if self.graphql_available < cost:
+            return False
+        self.graphql_available -= cost
+        return True
+
+    def call_limit_header(self):
+        return {"X-Shopify-Shop-Api-Call-Limit": f"{int(self.level)}/{self.bucket_size}"}
+
+    def json(self, data, status=200, headers=None):
+        return web.json_response(
+            data, status=status, headers={**self.call_limit_header(), **(headers or {})}
+        )
+
+    @web.middleware
+    async def middleware(self, request, handler):
+        if request.path.startswith("/_"):
+            return await handler(request)
+
+        resource = request.match_info.route.resource
+        endpoint = resource.canonical if resource is not None else request.path
+        key = f"{request.method} {endpoint.replace(API_PREFIX, '')}"
+        self.calls[key] = self.calls.get(key, 0) + 1
+
+        delay = self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0)
+        if delay:
+            await asyncio.sleep(delay)
+
+        # GraphQL requests are limited by their own cost bucket
+        if key.endswith("/graphql.json"):
+            return await handler(request)
+
+        throttled = self.throttle_rate and self.random.random() < self.throttle_rate
+        if throttled or not self.reserve():
+            self.throttled += 1
+            return web.json_response(
+                {"errors": "Exceeded 2 calls per second for api client. Reduce request rates to resume uninterrupted service."},
+                status=429,
+                headers={"Retry-After": "1.0", **self.call_limit_header()},
+            )
+        return await handler(request)
+
+    def filter_ids(self, filters):
+        """Return the sorted IDs of the products matching the query filters"""
+        ids = sorted(self.products)
+        if filters.get("ids"):
+            wanted = {int(value) for value in filters["ids"].split(",")}
+            ids = [product_id for product_id in ids if product_id in wanted]
+        if filters.get("since_id"):
+            since_id = int(filters["since_id"])
+            ids = [product_id for product_id in ids if product_id > since_id]
+        # Timestamps are all in UTC, so they compare as strings
+        for name, field, compare in (
+            ("updated_at_min", "updated_at", str.__ge__),
+            ("created_at_min", "created_at", str.__ge__),
+            ("created_at_max", "created_at", str.__le__),
+        ):
+            if filters.get(name):
+                ids = [
+                    product_id
+                    for product_id in ids
+                    if compare(self.products[product_id][field], filters[name])
+                ]
+        return ids
+
+    async def list_products(self, request):
+        query = request.query
+        limit = min(int(query.get("limit", 50)), 250)
+        if "page_info" in query:
+            state = decode_page_info(query["page_info"])
+        else:
+            state = {"offset": 0, **{name: query.get(name) for name in FILTERS}}
+
+        ids = self.filter_ids(state)
+        offset = state["offset"]
+        page = ids[offset : offset + limit]
+        links = []
+        base = request.url.with_query({})
+        if offset > 0:
+            previous_state = dict(state, offset=max(offset - limit, 0))
+            url = base.with_query({"limit": limit, "page_info": encode_page_info(previous_state)})
+            links.append(f'<{url}>; rel="previous"')
+        if offset + limit < len(ids):
+            next_state = dict(state, offset=offset + limit)
+            url = base.with_query({"limit": limit, "page_info": encode_page_info(next_state)})
+            links.append(f'<{url}>; rel="next"')
+
+        fields = query.get("fields")
+        headers = {"Link": ", ".join(links)} if links else None
+        return self.json(
+            {"products": [project(self.products[product_id], fields) for product_id in page]},
+            headers=headers,
+        )
+
+    async def count_products(self, request):
+        return self.json({"count": len(self.filter_ids(request.query))})
+
+    async def get_product(self, request):
+        product = self.products.get(int(request.match_info["id"]))
+        if product is None:
+            return self.json({"errors": "Not Found"}, status=404)
+        return self.json({"product": project(product, request.query.get("fields"))})
+
+    async def update_product(self, request):
+        product = self.products.get(int(request.match_info["id"]))
+        if product is None:
+            return self.json({"errors": "Not Found"}, status=404)
+        changes = (await request.json())["product"]
+        for name, value in changes.items():
+            if name not in ("id", "variants", "options", "images"):
+                product[name] = value
+        product["updated_at"] = time.strftime("%Y-%m-%dT%H:%M:%S+00:00", time.gmtime())
+        return self.json({"product": product})
+
+    async def delete_product(self, request):
+        if self.products.pop(int(request.match_info["id"]), None) is None:
+            return self.json({"errors": "Not Found"}, status=404)
+        return self.json({})
+
+    async def create_product(self, request):
+        product = make_product(self.next_id)
+        product.update((await request.json())["product"])
+        product["id"] = self.next_id
+        self.products[self.next_id] = product
+        self.next_id += 1
+        return self.json({"product": product}, status=201)
+
+    def graphql_response(self, data, cost=GRAPHQL_QUERY_COST, errors=None):
+        throttle_status = {
+            "maximumAvailable": float(self.graphql_bucket_size),
+            "currentlyAvailable": int(self.graphql_available),
+            "restoreRate": self.graphql_restore_rate,
+        }
+        body = {
+            "data": data,
+            "extensions": {
+                "cost": {
+                    "requestedQueryCost": cost,
+                    "actualQueryCost": None if errors else cost,
+                    "throttleStatus": throttle_status,
+                }
+            },
+        }
+        if errors:
+            body["errors"] = errors
+        return web.json_response(body)
+
+    def bulk_operation(self, operation_id, request):
+        """Return the state of a bulk operation, completing it once it has run long enough"""
+        operation = self.bulk_operations.get(operation_id)
+        if operation is None:
+            return None
+        if (
+            operation["status"] == "RUNNING"
+            and time.monotonic() - operation["started_at"] >= self.bulk_duration
+        ):
+            # The result is a snapshot of the catalog at completion
+            lines = [
+                json.dumps(record)
+                for product_id in sorted(self.products)
+                for record in bulk_records(self.products[product_id])
+            ]
+            number = operation_id.rpartition("/")[2]
+            self.bulk_results[number] = "".join(f"{line}\n" for line in lines).encode()
+            operation.update(
+                status="COMPLETED",
+                objectCount=str(len(lines)),
+                fileSize=str(len(self.bulk_results[number])),
+                url=str(request.url.with_path(f"/_bulk/{number}.jsonl").with_query({}))
+                if lines
+                else None,
+            )
+        return {
+            name: value for name, value in operation.items() if name != "started_at"
+        }
+
+    async def graphql(self, request):
+        payload = await request.json()
+        query = payload.get("query", "")
+        variables = payload.get("variables") or {}
+
+        if not self.reserve_graphql(GRAPHQL_QUERY_COST):
+            self.throttled += 1
+            return self.graphql_response(
+                None, errors=[{"message": "Throttled", "extensions": {"code": "THROTTLED"}}]
+            )
+
+        if "bulkOperationRunQuery" in query:
+            running = any(
+                self.bulk_operation(operation_id, request)["status"] == "RUNNING"
+                for operation_id in list(self.bulk_operations)
+            )
+            if running:
+                message = "A bulk query operation for this app and shop is already in progress"
+                result = {"bulkOperation": None, "userErrors": [{"field": None, "message": message}]}
+            else:
+                operation_id = gid("BulkOperation", len(self.bulk_operations) + 1)
+                self.bulk_operations[operation_id] = {
+                    "id": operation_id,
+                    "status": "RUNNING",
+                    "errorCode": None,
+                    "objectCount": "0",
+                    "fileSize": None,
+                    "url": None,
+                    "partialDataUrl": None,
+                    "started_at": time.monotonic(),
+                }
+                result = {
+                    "bulkOperation": {"id": operation_id, "status": "RUNNING"},
+                    "userErrors": [],
+                }
+            return self.graphql_response({"bulkOperationRunQuery": result})
+
+        if "bulkOperationCancel" in query:
+            operation = self.bulk_operation(variables.get("id"), request)
+            if operation is None or operation["status"] != "RUNNING":
+                message = "Bulk operation is not running"
+                result = {"bulkOperation": None, "userErrors": [{"field": ["id"], "message": message}]}
+            else:
+                self.bulk_operations[variables["id"]]["status"] = "CANCELED"
+                result = {
+                    "bulkOperation": {"id": variables["id"], "status": "CANCELED"},
+                    "userErrors": [],
+                }
+            return self.graphql_response({"bulkOperationCancel": result})
+
+        if "currentBulkOperation" in query:
+            current = None
+            if self.bulk_operations:
+                current = self.bulk_operation(list(self.bulk_operations)[-1], request)
+            return self.graphql_response({"currentBulkOperation": current})
+
+        if "node(id:" in query:
+            return self.graphql_response(
+                {"node": self.bulk_operation(variables.get("id"), request)}
+            )
+
+        return self.graphql_response(
+            None, errors=[{"message": "Query not supported by the mock"}]
+        )
+
+    async def bulk_result(self, request):
+        body = self.bulk_results.get(request.match_info["number"])
+        if body is None:
+            return web.Response(status=404)
+        # Streamed in chunks, like the pre-signed download URL of Shopify
+        response = web.StreamResponse(headers={"Content-Type": "application/jsonl"})
+        await response.prepare(request)
+        for offset in range(0, len(body), 64 * 1024):
+            await response.write(body[offset : offset + 64 * 1024])
+        await response.write_eof()
+        return response
+
+    async def stats(self, request):
+        return web.json_response(
+            {
+                "calls": self.calls,
+                "total_calls": sum(self.calls.values()),
+                "throttled": self.throttled,
+                "products": len(self.products),
+            }
+        )
+
+    def create_app(self):
+        app = web.Application(middlewares=[self.middleware])
+        app.router.add_get(API_PREFIX + "/products.json", self.list_products)
+        app.router.add_post(API_PREFIX + "/products.json", self.create_product)
+        app.router.add_get(API_PREFIX + "/products/count.json", self.count_products)
+        app.router.add_get(API_PREFIX + "/products/{id}.json", self.get_product)
+        app.router.add_put(API_PREFIX + "/products/{id}.json", self.update_product)
+        app.router.add_delete(API_PREFIX + "/products/{id}.json", self.delete_product)
+        app.router.add_post(API_PREFIX + "/graphql.json", self.graphql)
+        app.router.add_get("/_bulk/{number}.jsonl", self.bulk_result)
+        app.router.add_get("/_stats", self.stats)
+        return app
+
+
+async def start_mock(host="127.0.0.1", port=0, **options):
+    """
+    Start the mock API in the running event loop
+
+    Returns:
+    tuple: (MockShopify, AppRunner, base URL)
+    """
+    mock = MockShopify(**options)
+    runner = web.AppRunner(mock.create_app(), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    bound_port = runner.addresses[0][1]
+    return mock, runner, f"http://{host}:{bound_port}"
+
+
+def add_mock_arguments(parser):
+    parser.add_argument("--products", type=int, default=1000, help="Number of products")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Maximum random extra latency")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Share of requests answered with 429")
+    parser.add_argument("--bucket-size", type=int, default=1000, help="Call-limit bucket size (40 for a standard store)")
+    parser.add_argument("--leak-rate", type=float, default=500.0, help="Calls per second leaking out of the bucket (2 for a standard store)")
+    parser.add_argument("--graphql-bucket-size", type=int, default=1000, help="Points in the GraphQL cost bucket")
+    parser.add_argument("--graphql-restore-rate", type=float, default=50.0, help="Points per second restored to the GraphQL cost bucket")
+    parser.add_argument("--bulk-duration", type=float, default=1.0, help="Seconds a bulk query runs before it completes")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+
+
+def mock_options(args):
+    return {
+        "products": args.products,
+        "latency": args.latency,
+        "jitter": args.jitter,
+        "throttle_rate": args.throttle_rate,
+        "bucket_size": args.bucket_size,
+        "leak_rate": args.leak_rate,
+        "graphql_bucket_size": args.graphql_bucket_size,
+        "graphql_restore_rate": args.graphql_restore_rate,
+        "bulk_duration": args.bulk_duration,
+        "seed": args.seed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock Shopify Admin API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_mock_arguments(parser)
+    args = parser.parse_args()
+
+    mock = MockShopify(**mock_options(args))
+    print(f"Mock Shopify Admin API on http://{args.host}:{args.port}")
+    web.run_app(mock.create_app(), host=args.host, port=args.port, access_log=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,419 @@
+#!/usr/bin/env python
+"""
+Benchmarks of the MCP server against a local mock Shopify Admin API.
+
+Each scenario runs against the stdio entry point (through the MCP stdio
+client) and the HTTP entry point (through the streamable HTTP transport at
+/mcp). Throughput, p50/p99 latency and the number of upstream calls are
+reported for every combination.
+
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --latency 0.05 --throttle-rate 0.02 --json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import sys
+import time
+
+import aiohttp
+from mcp import ClientSession
+from mcp.client.stdio import StdioServerParameters, stdio_client
+
+from mock_shopify import add_mock_arguments, mock_options, start_mock
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = ("full_listing", "hot_get_product", "mixed", "interactive_under_load", "catalog_export")
+TRANSPORTS = ("stdio", "http")
+
+# Product IDs requested by the mixed scenario
+HOT_PRODUCTS = 50
+
+# Products updated by the bulk job of the interactive_under_load scenario
+BULK_PRODUCTS = 200
+
+
+def server_environment(shop_url, extra=None):
+    """Environment of a server process talking to the mock API"""
+    env = {
+        key: value
+        for key, value in os.environ.items()
+        if not key.startswith("SHOPIFY_") and key != "PORT"
+    }
+    env.update(
+        {
+            "SHOPIFY_SHOP_URL": shop_url,
+            "SHOPIFY_ADMIN_ACCESS_TOKEN": "benchmark",
+            "SHOPIFY_API_VERSION": "2025-01",
+            "PYTHONPATH": os.pathsep.join(
+                filter(None, [os.path.join(REPO_ROOT, "src"), os.environ.get("PYTHONPATH")])
+            ),
+        }
+    )
+    env.update(extra or {})
+    return env
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a list of values"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(int(round(fraction * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(index, len(ordered) - 1)]
+
+
+class StdioTarget:
+    """MCP server started as a subprocess and driven over stdio"""
+
+    name = "stdio"
+
+    def __init__(self, shop_url, env=None):
+        self.parameters = StdioServerParameters(
+            command=sys.executable,
+            args=["-m", "shopify_py_mcp"],
+            env=server_environment(shop_url, env),
+        )
+
+    async def __aenter__(self):
+        self._client = stdio_client(self.parameters)
+        read_stream, write_stream = await self._client.__aenter__()
+        self._session = ClientSession(read_stream, write_stream)
+        await self._session.__aenter__()
+        await self._session.initialize()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self._session.__aexit__(*exc_info)
+        await self._client.__aexit__(*exc_info)
+
+    async def list_tools(self):
+        result = await self._session.list_tools()
+        return result.tools
+
+    async def call(self, name, arguments):
+        result = await self._session.call_tool(name, arguments)
+        text = result.content[0].text if result.content else ""
+        return not result.isError and not text.startswith("An error occurred"), text
+
+
+class HttpTarget:
+    """HTTP server started as a subprocess and driven over the MCP streamable HTTP transport"""
+
+    name = "http"
+
+    def __init__(self, shop_url, env=None):
+        self.port = free_port()
+        self.env = server_environment(shop_url, {"PORT": str(self.port), **(env or {})})
+        self.url = f"http://127.0.0.1:{self.port}/mcp"
+        self._next_id = 0
+
+    async def __aenter__(self):
+        self._process = await asyncio.create_subprocess_exec(
+            sys.executable,
+            "-m",
+            "shopify_py_mcp",
+            env=self.env,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+        self._http = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=100),
+        )
+
+        # Wait until the server accepts connections
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                async with self._http.get(f"http://127.0.0.1:{self.port}/"):
+                    break
+            except aiohttp.ClientConnectionError:
+                if time.monotonic() > deadline:
+                    raise RuntimeError("The HTTP server did not start")
+                await asyncio.sleep(0.1)
+
+        async with self._http.post(
+            self.url,
+            json=self._request(
+                "initialize",
+                {
+                    "protocolVersion": "2024-11-05",
+                    "capabilities": {},
+                    "clientInfo": {"name": "benchmark", "version": "0.1.0"},
+                },
+            ),
+        ) as response:
+            response.raise_for_status()
+            self.session_id = response.headers["Mcp-Session-Id"]
+        async with self._http.post(
+            self.url,
+            json={"jsonrpc": "2.0", "method": "notifications/initialized"},
+            headers={"Mcp-Session-Id": self.session_id},
+        ):
+            pass
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self._http.close()
+        self._process.terminate()
+        await self._process.wait()
+
+    def _request(self, method, params):
+        self._next_id += 1
+        return {"jsonrpc": "2.0", "id": self._next_id, "method": method, "params": params}
+
+    async def list_tools(self):
+        async with self._http.post(
+            self.url,
+            json=self._request("tools/list", {}),
+            headers={"Mcp-Session-Id": self.session_id},
+        ) as response:
+            data = await response.json()
+        return data["result"]["tools"]
+
+    async def call(self, name, arguments):
+        async with self._http.post(
+            self.url,
+            json=self._request("tools/call", {"name": name, "arguments": arguments}),
+            headers={"Mcp-Session-Id": self.session_id},
+        ) as response:
+            data = await response.json()
+        result = data.get("result") or {}
+        content = result.get("content") or [{}]
+        text = content[0].get("text", "")
+        return (
+            "error" not in data
+            and not result.get("isError")
+            and not text.startswith("An error occurred")
+        ), text
+
+
+async def run_operations(operations, concurrency):
+    """
+    Run operations with bounded concurrency
+
+    Parameters:
+    operations (list): Coroutine functions returning True on success
+    concurrency (int): Operations running at the same time
+
+    Returns:
+    tuple: (latencies in seconds, error count, wall time in seconds)
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def run(operation):
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            ok = await operation()
+            latencies.append(time.perf_counter() - started)
+            if not ok:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(run(operation) for operation in operations))
+    return latencies, errors, time.perf_counter() - started
+
+
+def full_listing(target, args):
+    """Page through the whole catalog with list_products"""
+
+    async def operation():
+        cursor = None
+        while True:
+            arguments = {"limit": 250, "response_format": "compact"}
+            if cursor:
+                arguments["cursor"] = cursor
+            ok, text = await target.call("list_products", arguments)
+            if not ok:
+                return False
+            cursor = json.loads(text)["next_cursor"]
+            if not cursor:
+                return True
+
+    return [operation for _ in range(args.repeat)], 1, None
+
+
+def hot_get_product(target, args):
+    """Read the same product over and over"""
+
+    async def operation():
+        ok, _ = await target.call("get_product", {"product_id": 1})
+        return ok
+
+    return [operation for _ in range(args.requests)], args.concurrency, None
+
+
+def mixed(target, args):
+    """Concurrent reads of hot products, first-page listings and updates"""
+    rng = random.Random(args.seed)
+    operations = []
+    for index in range(args.requests):
+        roll = rng.random()
+        product_id = rng.randint(1, min(HOT_PRODUCTS, args.products))
+        if roll < 0.7:
+            name, arguments = "get_product", {"product_id": product_id}
+        elif roll < 0.9:
+            name, arguments = "list_products", {"limit": 50}
+        else:
+            name, arguments = "update_product", {
+                "product_id": product_id,
+                "title": f"Product {product_id} ({index})",
+            }
+
+        async def operation(name=name, arguments=arguments):
+            ok, _ = await target.call(name, arguments)
+            return ok
+
+        operations.append(operation)
+    return operations, args.concurrency, None
+
+
+def interactive_under_load(target, args):
+    """Read single products one at a time while a bulk update runs"""
+    count = min(BULK_PRODUCTS, args.products)
+
+    async def background():
+        products = [
+            {"product_id": product_id, "title": f"Bulk {product_id}"}
+            for product_id in range(1, count + 1)
+        ]
+        await target.call("bulk_update_products", {"products": products, "concurrency": 32})
+
+    def operation_for(index):
+        async def operation():
+            product_id = count + 1 + index % max(args.products - count, 1)
+            ok, _ = await target.call("get_product", {"product_id": product_id, "fresh": True})
+            return ok
+
+        return operation
+
+    return [operation_for(index) for index in range(args.requests)], 1, background
+
+
+def catalog_export(target, args):
+    """Export the whole catalog with a GraphQL bulk operation"""
+
+    async def operation():
+        ok, text = await target.call("export_catalog", {"response_format": "compact"})
+        # The mock lists every product with its three variants
+        return ok and json.loads(text)["counts"] == {
+            "Product": args.products,
+            "ProductVariant": 3 * args.products,
+        }
+
+    # Only one bulk query can run per shop at a time
+    return [operation for _ in range(args.repeat)], 1, None
+
+
+async def fetch_mock_stats(shop_url):
+    async with aiohttp.ClientSession() as http:
+        async with http.get(f"{shop_url}/_stats") as response:
+            return await response.json()
+
+
+async def run_scenario(transport, scenario, shop_url, args):
+    target_class = StdioTarget if transport == "stdio" else HttpTarget
+    async with target_class(shop_url) as target:
+        operations, concurrency, background = globals()[scenario](target, args)
+        # Warm up, so that the first operations do not pay for deferred imports
+        # (benchmarks/startup.py measures those)
+        await target.call("list_products", {"limit": 1})
+        before = await fetch_mock_stats(shop_url)
+        job = asyncio.ensure_future(background()) if background else None
+        latencies, errors, elapsed = await run_operations(operations, concurrency)
+        if job is not None:
+            await job
+        after = await fetch_mock_stats(shop_url)
+
+    return {
+        "transport": transport,
+        "scenario": scenario,
+        "operations": len(latencies),
+        "errors": errors,
+        "seconds": elapsed,
+        "throughput": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "upstream_calls": after["total_calls"] - before["total_calls"],
+        "throttled": after["throttled"] - before["throttled"],
+    }
+
+
+def print_table(results):
+    columns = (
+        ("transport", "{:<9}"),
+        ("scenario", "{:<22}"),
+        ("operations", "{:>10}"),
+        ("errors", "{:>6}"),
+        ("seconds", "{:>8.2f}"),
+        ("throughput", "{:>10.1f}"),
+        ("p50_ms", "{:>8.1f}"),
+        ("p99_ms", "{:>8.1f}"),
+        ("upstream_calls", "{:>14}"),
+        ("throttled", "{:>9}"),
+    )
+    header = " ".join(
+        fmt.replace(".2f", "").replace(".1f", "").format(name) for name, fmt in columns
+    )
+    print(header)
+    print("-" * len(header))
+    for result in results:
+        print(" ".join(fmt.format(result[name]) for name, fmt in columns))
+
+
+async def main_async(args):
+    mock, runner, shop_url = await start_mock(**mock_options(args))
+    results = []
+    try:
+        for scenario in args.scenarios:
+            for transport in args.transports:
+                # Every run starts a new server, which assumes an empty bucket
+                await asyncio.sleep(mock.drain_time())
+                results.append(await run_scenario(transport, scenario, shop_url, args))
+    finally:
+        await runner.cleanup()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Shopify MCP server")
+    add_mock_arguments(parser)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Comma-separated scenarios")
+    parser.add_argument("--transports", default=",".join(TRANSPORTS), help="Comma-separated transports")
+    parser.add_argument("--requests", type=int, default=500, help="Operations of the get_product and mixed scenarios")
+    parser.add_argument("--concurrency", type=int, default=16, help="Operations in flight at the same time")
+    parser.add_argument("--repeat", type=int, default=3, help="Full listings or exports in the full_listing and catalog_export scenarios")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    args = parser.parse_args()
+    args.scenarios = [name for name in args.scenarios.split(",") if name]
+    args.transports = [name for name in args.transports.split(",") if name]
+    for name in args.scenarios:
+        if name not in SCENARIOS:
+            parser.error(f"unknown scenario: {name}")
+    for name in args.transports:
+        if name not in TRANSPORTS:
+            parser.error(f"unknown transport: {name}")
+
+    results = asyncio.run(main_async(args))
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_table(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python
+"""
+Start-up time benchmark of the MCP server.
+
+Measures how long importing the server modules takes in a fresh
+interpreter, lists the slowest imports, and times how long the stdio and
+HTTP entry points take until the initialize handshake, the first
+tools/list request and the first tool call complete.
+
+    python benchmarks/startup.py
+    python benchmarks/startup.py --runs 10 --max-import-ms 800
+
+With --max-import-ms the exit status is 1 when importing a module takes
+longer than that (median of all runs), so the benchmark can guard against
+start-up regressions in CI.
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+from mock_shopify import start_mock
+from run_benchmarks import HttpTarget, StdioTarget, server_environment
+
+MODULES = ("shopify_py_mcp.server", "shopify_py_mcp.http_server")
+
+
+def time_import(module, env, runs):
+    """
+    Time importing a module in fresh interpreters
+
+    Parameters:
+    module (str): Module to import
+    env (dict): Environment of the interpreters
+    runs (int): Number of interpreters started
+
+    Returns:
+    list: Import times in milliseconds, without the interpreter's own start-up
+    """
+    code = (
+        "import time; started = time.perf_counter(); "
+        f"import {module}; print((time.perf_counter() - started) * 1000)"
+    )
+    times = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", code],
+            env=env,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        times.append(float(output.strip().splitlines()[-1]))
+    return times
+
+
+def slowest_imports(module, env, count):
+    """
+    Return the top-level packages that take longest to import with a module
+
+    Parameters:
+    module (str): Module to import
+    env (dict): Environment of the interpreter
+    count (int): Number of packages to return
+
+    Returns:
+    list: (package, cumulative milliseconds) pairs, slowest first
+    """
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stderr
+    packages = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        name = name.strip()
+        if not cumulative.strip().isdigit():
+            continue
+        package = name.split(".")[0]
+        # Only the outermost import of a package holds its full cost
+        packages[package] = max(packages.get(package, 0), int(cumulative) / 1000)
+    ranked = sorted(packages.items(), key=lambda item: item[1], reverse=True)
+    return [item for item in ranked if item[0] != "shopify_py_mcp"][:count]
+
+
+async def time_entry_point(target_class, shop_url):
+    """
+    Time an entry point from process start to the first tool call
+
+    Returns:
+    dict: Milliseconds until the handshake completed, of the first tools/list
+        request, of a second one, and of the first tool call
+    """
+    started = time.perf_counter()
+    async with target_class(shop_url) as target:
+        ready = time.perf_counter()
+        await target.list_tools()
+        first = time.perf_counter()
+        await target.list_tools()
+        second = time.perf_counter()
+        await target.call("get_product", {"product_id": 1})
+        called = time.perf_counter()
+    return {
+        "ready_ms": (ready - started) * 1000,
+        "first_list_tools_ms": (first - ready) * 1000,
+        "list_tools_ms": (second - first) * 1000,
+        "first_call_ms": (called - second) * 1000,
+    }
+
+
+async def time_entry_points(runs):
+    mock, runner, shop_url = await start_mock(products=10)
+    results = {}
+    try:
+        for target_class in (StdioTarget, HttpTarget):
+            samples = [await time_entry_point(target_class, shop_url) for _ in range(runs)]
+            results[target_class.name] = {
+                name: statistics.median(sample[name] for sample in samples)
+                for name in samples[0]
+            }
+    finally:
+        await runner.cleanup()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the start-up time of the Shopify MCP server")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh processes started per measurement")
+    parser.add_argument("--top", type=int, default=8, help="Slowest imported packages listed")
+    parser.add_argument("--max-import-ms", type=float, help="Fail if the median import time of a module exceeds this")
+    parser.add_argument("--skip-entry-points", action="store_true", help="Only measure import times")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    args = parser.parse_args()
+
+    env = server_environment("http://127.0.0.1:9")
+    results = {"imports": {}, "entry_points": {}}
+    for module in MODULES:
+        times = time_import(module, env, args.runs)
+        results["imports"][module] = {
+            "min_ms": min(times),
+            "median_ms": statistics.median(times),
+            "slowest": slowest_imports(module, env, args.top),
+        }
+    if not args.skip_entry_points:
+        results["entry_points"] = asyncio.run(time_entry_points(args.runs))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for module, result in results["imports"].items():
+            print(f"import {module}: median {result['median_ms']:.0f} ms, min {result['min_ms']:.0f} ms")
+            for package, milliseconds in result["slowest"]:
+                print(f"    {package:<24} {milliseconds:8.1f} ms")
+        for name, result in results["entry_points"].items():
+            print(
+                f"{name}: ready after {result['ready_ms']:.0f} ms, "
+                f"first tools/list {result['first_list_tools_ms']:.1f} ms, "
+                f"then {result['list_tools_ms']:.1f} ms, "
+                f"first tool call {result['first_call_ms']:.1f} ms"
+            )
+
+    if args.max_import_ms is not None:
+        slow = [
+            module
+            for module, result in results["imports"].items()
+            if result["median_ms"] > args.max_import_ms
+        ]
+        if slow:
+            print(f"Import time above {args.max_import_ms:.0f} ms: {', '.join(slow)}", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -11,8 +11,6 @@ def check_environment_variables():
     """Check if all required environment variables are set."""
     required_vars = [
         "SHOPIFY_SHOP_URL",
-        "SHOPIFY_API_KEY",
-        "SHOPIFY_API_PASSWORD",
         "SHOPIFY_API_VERSION",
         "SHOPIFY_ADMIN_ACCESS_TOKEN",
         "PORT",
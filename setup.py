@@ -10,6 +10,9 @@ setup(
         "ShopifyAPI>=1.0.0",
         "aiohttp>=3.8.0",
     ],
+    extras_require={
+        "fast": ["orjson>=3.9.0"],
+    },
     entry_points={
         "console_scripts": [
             "shopify-py-mcp=shopify_py_mcp:main",
@@ -0,0 +1,275 @@
+import asyncio
+import contextlib
+import json
+import os
+import time
+
+# Catalog query run as a bulk operation
+CATALOG_QUERY = """
+{
+  products {
+    edges {
+      node {
+        id
+        title
+        handle
+        vendor
+        productType
+        status
+        tags
+        createdAt
+        updatedAt
+        variants {
+          edges {
+            node {
+              id
+              title
+              sku
+              price
+              inventoryQuantity
+            }
+          }
+        }
+      }
+    }
+  }
+}
+"""
+
+RUN_QUERY_MUTATION = """
+mutation RunBulkQuery($query: String!) {
+  bulkOperationRunQuery(query: $query) {
+    bulkOperation { id status }
+    userErrors { field message }
+  }
+}
+"""
+
+BULK_OPERATION_QUERY = """
+query BulkOperation($id: ID!) {
+  node(id: $id) {
+    ... on BulkOperation {
+      id
+      status
+      errorCode
+      objectCount
+      fileSize
+      url
+      partialDataUrl
+    }
+  }
+}
+"""
+
+BULK_OPERATION_CANCEL_MUTATION = """
+mutation CancelBulkOperation($id: ID!) {
+  bulkOperationCancel(id: $id) {
+    bulkOperation { id status }
+    userErrors { field message }
+  }
+}
+"""
+
+# Polling settings
+DEFAULT_POLL_INTERVAL = 1.0
+MAX_POLL_INTERVAL = 10.0
+DEFAULT_EXPORT_TIMEOUT = 3600
+
+# Size of chunks read from the result file
+CHUNK_SIZE = 64 * 1024
+
+# Seconds a read of the result file may stall; the download as a whole has
+# no time limit, since large exports take longer than any fixed bound
+READ_TIMEOUT = 120
+
+FINISHED_STATUSES = ("COMPLETED", "FAILED", "CANCELED", "EXPIRED")
+
+
+def parse_gid(gid):
+    """
+    Split a Shopify global ID into its resource type and numeric ID
+
+    Parameters:
+    gid (str): Global ID such as gid://shopify/Product/123
+
+    Returns:
+    tuple: (resource type, numeric ID)
+    """
+    resource, _, object_id = gid.rpartition("/")
+    return resource.rpartition("/")[2], int(object_id)
+
+
+def resolve_export_path(export_dir, output_path):
+    """
+    Resolve the file an export is written to inside the export directory
+
+    Parameters:
+    export_dir (str): Directory exports may be written to ("" if exports to files are disabled)
+    output_path (str): Path relative to the export directory
+
+    Returns:
+    str: Absolute path of the file
+    """
+    if not export_dir:
+        raise ValueError("Exports to files are disabled (set SHOPIFY_EXPORT_DIR)")
+    if os.path.isabs(output_path):
+        raise ValueError("output_path must be relative to the export directory")
+
+    root = os.path.realpath(export_dir)
+    # realpath also follows symbolic links that point out of the directory
+    path = os.path.realpath(os.path.join(root, output_path))
+    if os.path.commonpath([root, path]) != root or path == root:
+        raise ValueError(f"output_path is outside the export directory: {output_path}")
+    return path
+
+
+async def start_bulk_export(client, query=CATALOG_QUERY):
+    """
+    Start a bulk query operation
+
+    Parameters:
+    client (ShopifyClient): Shopify API client
+    query (str): Bulk query to run
+
+    Returns:
+    str: Global ID of the bulk operation
+    """
+    data = await client.graphql(RUN_QUERY_MUTATION, {"query": query})
+    result = data["bulkOperationRunQuery"]
+    if result["userErrors"]:
+        messages = "; ".join(error["message"] for error in result["userErrors"])
+        raise ValueError(f"Bulk operation could not be started: {messages}")
+    return result["bulkOperation"]["id"]
+
+
+async def wait_for_bulk_operation(
+    client, operation_id, timeout=DEFAULT_EXPORT_TIMEOUT, poll_interval=DEFAULT_POLL_INTERVAL
+):
+    """
+    Poll a bulk operation until it finishes
+
+    Parameters:
+    client (ShopifyClient): Shopify API client
+    operation_id (str): Global ID of the bulk operation
+    timeout (float): Maximum number of seconds to wait
+    poll_interval (float): Initial delay between polls
+
+    Returns:
+    dict: Final bulk operation state
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        data = await client.graphql(BULK_OPERATION_QUERY, {"id": operation_id})
+        operation = data.get("node")
+        if operation is None:
+            raise ValueError(f"Bulk operation not found: {operation_id}")
+        if operation["status"] in FINISHED_STATUSES:
+            return operation
+
+        if time.monotonic() >= deadline:
+            raise TimeoutError(f"Bulk operation {operation_id} did not finish in time")
+
+        # Back off gradually while the export is running
+        await asyncio.sleep(poll_interval)
+        poll_interval = min(poll_interval * 1.5, MAX_POLL_INTERVAL)
+
+
+async def iter_jsonl(url, chunk_size=CHUNK_SIZE):
+    """
+    Stream a JSONL file, yielding one decoded object per line
+
+    The file is read in fixed-size chunks, so memory use is bounded by the
+    chunk size and the longest line rather than the size of the file.
+
+    Parameters:
+    url (str): URL of the JSONL file
+    chunk_size (int): Number of bytes read at a time
+
+    Yields:
+    dict: Decoded line
+    """
+    import aiohttp
+
+    # The result URL is pre-signed, so no Shopify credentials are sent
+    timeout = aiohttp.ClientTimeout(total=None, sock_read=READ_TIMEOUT)
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        async with session.get(url) as response:
+            response.raise_for_status()
+            buffer = b""
+            async for chunk in response.content.iter_chunked(chunk_size):
+                buffer += chunk
+                lines = buffer.split(b"\n")
+                buffer = lines.pop()
+                for line in lines:
+                    if line.strip():
+                        yield json.loads(line)
+            if buffer.strip():
+                yield json.loads(buffer)
+
+
+async def cancel_bulk_operation(client, operation_id):
+    """
+    Cancel a running bulk operation
+
+    Parameters:
+    client (ShopifyClient): Shopify API client
+    operation_id (str): Global ID of the bulk operation
+    """
+    data = await client.graphql(BULK_OPERATION_CANCEL_MUTATION, {"id": operation_id})
+    result = data["bulkOperationCancel"]
+    if result["userErrors"]:
+        messages = "; ".join(error["message"] for error in result["userErrors"])
+        raise ValueError(f"Bulk operation could not be canceled: {messages}")
+
+
+async def export_catalog(client, output_path=None, timeout=DEFAULT_EXPORT_TIMEOUT):
+    """
+    Export the whole product catalog with a GraphQL bulk operation
+
+    Parameters:
+    client (ShopifyClient): Shopify API client
+    output_path (str): File the JSONL records are written to (None for a summary
+        only); callers resolve it with resolve_export_path
+    timeout (float): Maximum number of seconds to wait for the export
+
+    Returns:
+    dict: Summary of the export
+    """
+    operation_id = await start_bulk_export(client)
+    try:
+        operation = await wait_for_bulk_operation(client, operation_id, timeout=timeout)
+    except (TimeoutError, asyncio.CancelledError):
+        # Only one bulk query can run per shop, so do not leave it running
+        with contextlib.suppress(Exception):
+            await cancel_bulk_operation(client, operation_id)
+        raise
+
+    summary = {
+        "operation_id": operation_id,
+        "status": operation["status"],
+        "error_code": operation.get("errorCode"),
+        "object_count": int(operation.get("objectCount") or 0),
+        "counts": {},
+        "output_path": output_path,
+    }
+    if operation["status"] != "COMPLETED":
+        return summary
+
+    # An export of an empty catalog has no result file
+    url = operation.get("url")
+    if not url:
+        return summary
+
+    output = open(output_path, "w", encoding="utf-8") if output_path else None
+    try:
+        async for record in iter_jsonl(url):
+            resource, _ = parse_gid(record["id"])
+            summary["counts"][resource] = summary["counts"].get(resource, 0) + 1
+            if output is not None:
+                output.write(json.dumps(record, ensure_ascii=False))
+                output.write("\n")
+    finally:
+        if output is not None:
+            output.close()
+
+    return summary
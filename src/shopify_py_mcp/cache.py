@@ -0,0 +1,103 @@
+import time
+from collections import OrderedDict
+
+# Default cache settings
+DEFAULT_TTL = 60
+DEFAULT_MAX_SIZE = 1000
+
+
+class ProductCache:
+    """
+    Bounded in-process cache of product resources
+
+    Entries expire after a fixed time-to-live and the least recently used
+    entry is evicted once the cache is full. A TTL or size of 0 disables
+    caching.
+    """
+
+    def __init__(self, ttl=DEFAULT_TTL, max_size=DEFAULT_MAX_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self):
+        return self.ttl > 0 and self.max_size > 0
+
+    def get(self, product_id):
+        """
+        Return a cached product
+
+        Parameters:
+        product_id (int): Product ID
+
+        Returns:
+        dict: Product resource (None if not cached or expired)
+        """
+        key = int(product_id)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, product = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return product
+
+    def peek(self, product_id):
+        """Return a cached product without touching counters or LRU order"""
+        entry = self._entries.get(int(product_id))
+        if entry is None or entry[0] <= time.monotonic():
+            return None
+        return entry[1]
+
+    def set(self, product):
+        """
+        Store a product
+
+        Parameters:
+        product (dict): Product resource including its id
+        """
+        if not self.enabled or not product or product.get("id") is None:
+            return
+        key = int(product["id"])
+        self._entries[key] = (time.monotonic() + self.ttl, product)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, product_id):
+        """Remove a product from the cache"""
+        self._entries.pop(int(product_id), None)
+
+    def clear(self):
+        """Remove all products from the cache"""
+        self._entries.clear()
+
+    def stats(self):
+        """
+        Return cache counters
+
+        Returns:
+        dict: Size, limits and hit/miss counters
+        """
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,386 @@
+import asyncio
+import copy
+import json
+import time
+
+from shopify_py_mcp.coalesce import RequestCoalescer
+from shopify_py_mcp.metrics import (
+    UPSTREAM_BYTES,
+    UPSTREAM_DURATION,
+    UPSTREAM_REQUESTS,
+    endpoint_label,
+)
+from shopify_py_mcp.rate_limit import (
+    DEFAULT_MAX_RETRIES,
+    CallLimitBucket,
+    GraphQLCostBucket,
+    backoff_delay,
+    parse_retry_after,
+)
+from shopify_py_mcp.scheduler import PriorityScheduler, current_priority
+from shopify_py_mcp.tracing import span
+
+# Connection pool settings
+DEFAULT_MAX_CONNECTIONS = 20
+DEFAULT_KEEPALIVE_TIMEOUT = 60
+DEFAULT_TIMEOUT = 30
+
+
+class ShopifyAPIError(Exception):
+    """Error returned by the Shopify Admin API"""
+
+    def __init__(self, status, message, headers=None):
+        super().__init__(f"{status} {message}")
+        self.status = status
+        self.message = message
+        self.headers = headers or {}
+
+
+class ShopifyResponse:
+    """Decoded response from the Shopify Admin API"""
+
+    def __init__(self, status, headers, data):
+        self.status = status
+        self.headers = headers
+        self.data = data
+
+
+def copy_response(response):
+    """Return a response whose data can be modified independently"""
+    return ShopifyResponse(response.status, response.headers, copy.deepcopy(response.data))
+
+
+def build_base_url(shop_url, api_version):
+    """
+    Build the Admin REST API base URL for a shop
+
+    Parameters:
+    shop_url (str): Shop domain (e.g. mystore.myshopify.com) or full URL
+    api_version (str): Shopify API version
+
+    Returns:
+    str: Base URL of the Admin REST API
+    """
+    shop_url = shop_url.rstrip("/")
+    # Allow an explicit scheme so that local stand-in servers can be used
+    if not shop_url.startswith(("http://", "https://")):
+        shop_url = f"https://{shop_url}"
+    return f"{shop_url}/admin/api/{api_version}"
+
+
+def extract_error_message(data, default):
+    """
+    Extract a readable error message from a Shopify error body
+
+    Parameters:
+    data: Decoded response body
+    default (str): Message to use when the body has no errors
+
+    Returns:
+    str: Error message
+    """
+    if isinstance(data, dict) and "errors" in data:
+        errors = data["errors"]
+        if isinstance(errors, str):
+            return errors
+        return json.dumps(errors, ensure_ascii=False)
+    return default
+
+
+class ShopifyClient:
+    """
+    Async client for the Shopify Admin REST API
+
+    A single aiohttp session (and its keep-alive connection pool) is shared by
+    all requests made through the client, so concurrent tool calls overlap
+    their network I/O instead of blocking the event loop. Every request goes
+    through the client's leaky bucket and throttled requests are retried.
+    Identical GET requests that overlap in time share one upstream call.
+    When the bucket is full, waiting requests are served by priority class
+    (see PriorityScheduler). GraphQL queries are limited by their own cost
+    bucket instead (see GraphQLCostBucket).
+    """
+
+    def __init__(
+        self,
+        shop_url,
+        api_version,
+        access_token,
+        max_connections=DEFAULT_MAX_CONNECTIONS,
+        timeout=DEFAULT_TIMEOUT,
+        rate_limiter=None,
+        max_retries=DEFAULT_MAX_RETRIES,
+        name=None,
+        priority_weights=None,
+    ):
+        self.shop_url = shop_url
+        self.api_version = api_version
+        self.access_token = access_token
+        self.base_url = build_base_url(shop_url, api_version)
+        # Shop label of the client's metrics
+        self.shop_label = name or shop_url.split("://")[-1].rstrip("/")
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter or CallLimitBucket()
+        self.graphql_limiter = GraphQLCostBucket()
+        self.max_retries = max_retries
+        self.scheduler = PriorityScheduler(
+            self.rate_limiter, priority_weights, shop_label=self.shop_label
+        )
+        self.coalescer = RequestCoalescer()
+        self._session = None
+        self._loop = None
+
+    def _get_session(self):
+        """Return the pooled HTTP session, creating it on first use"""
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            # Imported on first use to keep it out of the server's start-up time
+            import aiohttp
+
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                keepalive_timeout=DEFAULT_KEEPALIVE_TIMEOUT,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={
+                    "X-Shopify-Access-Token": self.access_token,
+                    "Accept": "application/json",
+                },
+            )
+            self._loop = loop
+        return self._session
+
+    def url_for(self, path):
+        """Return the absolute URL for an API path such as 'products.json'"""
+        if path.startswith(("http://", "https://")):
+            return path
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    async def request(self, method, path, params=None, payload=None):
+        """
+        Send a request to the Admin API
+
+        Parameters:
+        method (str): HTTP method
+        path (str): API path relative to the versioned base URL, or a full URL
+        params (dict): Query parameters
+        payload (dict): JSON request body
+
+        Returns:
+        ShopifyResponse: Decoded response
+        """
+        attempt = 0
+        while True:
+            priority = current_priority()
+            with span("rate_limit.wait", priority=priority):
+                await self.scheduler.acquire(priority)
+            try:
+                return await self._send(method, path, params, payload)
+            except ShopifyAPIError as e:
+                if e.status != 429 or attempt >= self.max_retries:
+                    raise
+                # Throttled: pause the whole bucket, then retry
+                retry_after = parse_retry_after(e.headers.get("Retry-After"))
+                self.rate_limiter.throttled(backoff_delay(attempt, retry_after))
+                attempt += 1
+
+    async def _send(self, method, path, params, payload, reserved=True):
+        """
+        Send a single HTTP request and decode the response
+
+        reserved tells whether the request holds a slot of the REST bucket,
+        which is returned once the response headers arrive.
+        """
+        labels = {"shop": self.shop_label, "method": method, "endpoint": endpoint_label(path)}
+        body = None
+        headers = None
+        try:
+            session = self._get_session()
+            if payload is not None:
+                body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                headers = {"Content-Type": "application/json"}
+        except BaseException:
+            if reserved:
+                self.rate_limiter.finish()
+            raise
+        if body is not None:
+            UPSTREAM_BYTES.inc(len(body), shop=self.shop_label, direction="sent")
+
+        status = "error"
+        started = time.perf_counter()
+        finished = not reserved
+        with span(
+            f"{method} {labels['endpoint']}",
+            kind="client",
+            **{"shop": self.shop_label, "http.request.method": method, "url.path": labels["endpoint"]},
+        ) as current:
+            try:
+                async with session.request(
+                    method, self.url_for(path), params=params, data=body, headers=headers
+                ) as response:
+                    status = response.status
+                    if reserved:
+                        self.rate_limiter.finish(response.headers)
+                        finished = True
+                        self.scheduler.wake()
+                    content = await response.read()
+            finally:
+                if not finished:
+                    # No response: the request no longer holds its slot
+                    self.rate_limiter.finish()
+                    self.scheduler.wake()
+                UPSTREAM_DURATION.observe(time.perf_counter() - started, **labels)
+                UPSTREAM_REQUESTS.inc(status=status, **labels)
+            if current is not None:
+                current.set_attribute("http.response.status_code", status)
+                current.set_attribute("http.response.body.size", len(content))
+                if status >= 400:
+                    current.set_error(f"HTTP {status}")
+        UPSTREAM_BYTES.inc(len(content), shop=self.shop_label, direction="received")
+
+        # Decoding is traced separately from the network time
+        with span("decode", bytes=len(content)):
+            try:
+                data = json.loads(content) if content.strip() else {}
+            except ValueError:
+                data = {}
+        if status >= 400:
+            raise ShopifyAPIError(
+                status,
+                extract_error_message(data, response.reason),
+                response.headers,
+            )
+        return ShopifyResponse(status, response.headers, data)
+
+    async def get(self, path, params=None):
+        # Reads with the same URL, query and priority class share a single
+        # in-flight request; an interactive read never waits for a shared
+        # request queued at background priority
+        key = (
+            current_priority(),
+            self.url_for(path),
+            tuple(sorted((name, str(value)) for name, value in (params or {}).items())),
+        )
+        return await self.coalescer.run(
+            key,
+            lambda: self.request("GET", path, params=params),
+            copy_result=copy_response,
+        )
+
+    async def post(self, path, payload):
+        return await self.request("POST", path, payload=payload)
+
+    async def put(self, path, payload):
+        return await self.request("PUT", path, payload=payload)
+
+    async def delete(self, path):
+        return await self.request("DELETE", path)
+
+    async def graphql(self, query, variables=None):
+        """
+        Run a query against the Admin GraphQL API
+
+        Parameters:
+        query (str): GraphQL query or mutation
+        variables (dict): Query variables
+
+        Returns:
+        dict: The data member of the response
+        """
+        payload = {"query": query, "variables": variables or {}}
+        attempt = 0
+        while True:
+            # GraphQL cost is limited separately, so these requests neither
+            # take nor pause slots of the REST bucket
+            await self.graphql_limiter.acquire()
+            try:
+                response = await self._send("POST", "graphql.json", None, payload, reserved=False)
+            except ShopifyAPIError as e:
+                if e.status != 429 or attempt >= self.max_retries:
+                    raise
+                retry_after = parse_retry_after(e.headers.get("Retry-After"))
+                self.graphql_limiter.throttled(backoff_delay(attempt, retry_after))
+                attempt += 1
+                continue
+
+            cost = (response.data.get("extensions") or {}).get("cost")
+            self.graphql_limiter.update(cost)
+            errors = response.data.get("errors")
+            if not errors:
+                return response.data.get("data") or {}
+
+            # GraphQL reports throttling in the body rather than with a 429
+            throttled = isinstance(errors, list) and any(
+                (error.get("extensions") or {}).get("code") == "THROTTLED"
+                for error in errors
+            )
+            if not throttled or attempt >= self.max_retries:
+                raise ShopifyAPIError(
+                    response.status,
+                    extract_error_message(response.data, "GraphQL error"),
+                    response.headers,
+                )
+            self.graphql_limiter.throttled(self.graphql_limiter.throttle_delay(cost, attempt))
+            attempt += 1
+
+    async def close(self):
+        """Close the underlying HTTP session"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._loop = None
+
+
+class SessionManager:
+    """
+    Long-lived owner of the Shopify client
+
+    The client (and with it the keep-alive TLS connection pool) is created
+    once and reused across tool calls. It is only replaced when the shop URL,
+    API version or access token changes.
+    """
+
+    def __init__(self, **client_options):
+        self.client_options = client_options
+        self._client = None
+        self._key = None
+
+    def get_client(self, shop_url, api_version, access_token):
+        """
+        Return the client for the given credentials
+
+        Parameters:
+        shop_url (str): Shop domain or URL
+        api_version (str): Shopify API version
+        access_token (str): Admin API access token
+
+        Returns:
+        ShopifyClient: Shared client
+        """
+        key = (shop_url, api_version, access_token)
+        if self._client is not None and self._key == key:
+            return self._client
+
+        previous = self._client
+        self._client = ShopifyClient(
+            shop_url, api_version, access_token, **self.client_options
+        )
+        self._key = key
+
+        # Close the connections held for the old credentials
+        if previous is not None:
+            try:
+                asyncio.get_running_loop().create_task(previous.close())
+            except RuntimeError:
+                pass
+        return self._client
+
+    async def close(self):
+        """Close the current client"""
+        if self._client is not None:
+            await self._client.close()
+        self._client = None
+        self._key = None
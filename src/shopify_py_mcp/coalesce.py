@@ -0,0 +1,72 @@
+import asyncio
+
+
+class RequestCoalescer:
+    """
+    Singleflight coalescing of identical concurrent requests
+
+    While a request for a key is in flight, later callers with the same key
+    wait for it instead of sending their own, and all of them receive its
+    result (or its exception). Nothing is kept once the request finishes, so
+    this never serves stale data.
+    """
+
+    def __init__(self):
+        self.in_flight = {}
+        # Number of callers that joined each in-flight request (a one-item
+        # list, so the caller that started it can still read it once the
+        # entry is gone)
+        self.joined = {}
+        self.requests = 0
+        self.coalesced = 0
+
+    async def run(self, key, factory, copy_result=None):
+        """
+        Run a request, or join the identical request already in flight
+
+        Parameters:
+        key (hashable): Identity of the request
+        factory (callable): Returns the coroutine that performs the request
+        copy_result (callable): Copies the result for every caller of a shared
+            request, so they can modify it without affecting each other (None
+            to share it)
+
+        Returns:
+        Result of the request
+        """
+        self.requests += 1
+        future = self.in_flight.get(key)
+        if future is not None:
+            self.coalesced += 1
+            self.joined[future][0] += 1
+            result = await asyncio.shield(future)
+            return copy_result(result) if copy_result else result
+
+        future = asyncio.ensure_future(factory())
+        self.in_flight[key] = future
+        joined = self.joined[future] = [0]
+        future.add_done_callback(lambda done: self._finish(key, done))
+        # Shielded so that a cancelled caller does not cancel the request
+        # for the callers that joined it
+        result = await asyncio.shield(future)
+        # The caller that started the request usually resumes first, so it
+        # gets a copy as well whenever others share the result
+        return copy_result(result) if copy_result and joined[0] else result
+
+    def _finish(self, key, future):
+        if self.in_flight.get(key) is future:
+            del self.in_flight[key]
+        self.joined.pop(future, None)
+        # Mark the exception as retrieved in case every caller was cancelled
+        if not future.cancelled():
+            future.exception()
+
+    def stats(self):
+        """Return request and deduplication counters"""
+        return {
+            "requests": self.requests,
+            "upstream_requests": self.requests - self.coalesced,
+            "coalesced": self.coalesced,
+            "in_flight": len(self.in_flight),
+            "coalesce_rate": self.coalesced / self.requests if self.requests else 0.0,
+        }
@@ -1,23 +1,89 @@
 import asyncio
+import contextlib
 import os
 import json
+import signal
 from aiohttp import web
-from shopify_py_mcp.server import server, initialize_shopify_api, handle_list_tools, handle_call_tool
-
-# Initialize Shopify API
-initialize_shopify_api()
+from shopify_py_mcp.server import (
+    server,
+    get_tool_list,
+    handle_call_tool,
+    handle_product_webhook,
+    iter_product_summaries,
+    close_shopify_client,
+    get_initialization_options,
+    shop_registry,
+    use_shop,
+    JSON_ENCODER,
+)
+from shopify_py_mcp.metrics import CONTENT_TYPE, RESPONSE_BYTES, registry as metrics_registry
+from shopify_py_mcp.scheduler import BACKGROUND, request_priority
+from shopify_py_mcp.serialization import dumps
+from shopify_py_mcp.transport import DEFAULT_MAX_SESSIONS, DEFAULT_SESSION_TTL, McpTransport
+from shopify_py_mcp.webhooks import (
+    HMAC_HEADER,
+    SHOP_DOMAIN_HEADER,
+    TOPIC_HEADER,
+    verify_webhook_hmac,
+)
 
 # Get port from environment variable (Railway sets this)
 PORT = int(os.environ.get("PORT", 8000))
 
+# Seconds an idle MCP session is kept alive
+SESSION_TTL = float(os.environ.get("SHOPIFY_MCP_SESSION_TTL", DEFAULT_SESSION_TTL))
+
+# Maximum number of open MCP sessions
+MAX_SESSIONS = int(os.environ.get("SHOPIFY_MCP_MAX_SESSIONS", DEFAULT_MAX_SESSIONS))
+
+# Browser origins allowed to use /mcp besides local pages (comma-separated)
+ALLOWED_ORIGINS = [
+    origin.strip()
+    for origin in os.environ.get("SHOPIFY_MCP_ALLOWED_ORIGINS", "").split(",")
+    if origin.strip()
+]
+
+# MCP streamable HTTP transport served at /mcp
+mcp_transport = McpTransport(
+    server,
+    get_initialization_options(),
+    session_ttl=SESSION_TTL,
+    max_sessions=MAX_SESSIONS,
+    allowed_origins=ALLOWED_ORIGINS,
+)
+
+metrics_registry.callback(
+    "shopify_mcp_sessions",
+    "Open MCP transport sessions",
+    lambda: [({}, len(mcp_transport.sessions))],
+)
+
 # Create routes for the HTTP server
 routes = web.RouteTableDef()
 
+# The routes below are a compatibility layer for clients that do not speak
+# the MCP transport; each request is handled without a session
+
+# Serialized list_tools response, with the tool list it was built from
+_tools_payload = None
+_tools_payload_source = None
+
+
+def get_tools_payload():
+    """Return the list_tools response body, serializing the tool list only when it changes"""
+    global _tools_payload, _tools_payload_source
+    tools = get_tool_list()
+    if _tools_payload is None or _tools_payload_source is not tools:
+        _tools_payload = json.dumps(
+            {"tools": [tool.model_dump() for tool in tools]}
+        ).encode("utf-8")
+        _tools_payload_source = tools
+    return _tools_payload
+
 @routes.post("/mcp/list_tools")
 async def http_handle_list_tools(request):
     """Handle list_tools request"""
-    tools = await handle_list_tools()
-    return web.json_response({"tools": [tool.model_dump() for tool in tools]})
+    return web.Response(body=get_tools_payload(), content_type="application/json")
 
 @routes.post("/mcp/call_tool")
 async def http_handle_call_tool(request):
@@ -32,6 +98,116 @@ async def http_handle_call_tool(request):
     result = await handle_call_tool(name, arguments)
     return web.json_response({"result": [item.model_dump() for item in result]})
 
+def encode_line(data):
+    """Encode an object as compact JSON"""
+    return dumps(data, "compact", JSON_ENCODER)
+
+@routes.post("/mcp/stream_products")
+async def http_handle_stream_products(request):
+    """
+    Stream the product list as NDJSON or server-sent events
+
+    Each page is written to the client as soon as it has been fetched.
+    NDJSON responses hold one product per line; SSE responses send one
+    "page" event per page and an "end" event with the total count.
+    """
+    try:
+        arguments = await request.json() if request.can_read_body else {}
+    except ValueError:
+        return web.json_response({"error": "Invalid JSON body"}, status=400)
+    if not isinstance(arguments, dict):
+        return web.json_response({"error": "The request body must be a JSON object"}, status=400)
+    shop_name = arguments.pop("shop", None)
+    try:
+        shop_registry.get(shop_name)
+    except ValueError as e:
+        return web.json_response({"error": str(e)}, status=400)
+    stream_format = arguments.pop("format", None)
+    if stream_format is None:
+        accept = request.headers.get("Accept", "")
+        stream_format = "sse" if "text/event-stream" in accept else "ndjson"
+    if stream_format not in ("ndjson", "sse"):
+        return web.json_response({"error": f"Unknown stream format: {stream_format}"}, status=400)
+
+    response = web.StreamResponse()
+    if stream_format == "sse":
+        response.content_type = "text/event-stream"
+        response.headers["Cache-Control"] = "no-cache"
+    else:
+        response.content_type = "application/x-ndjson"
+    await response.prepare(request)
+
+    count = 0
+    try:
+        try:
+            # Streamed listings yield to interactive reads in the request
+            # scheduler; aclosing stops partition fetches as soon as the
+            # stream ends, even when the client goes away
+            with use_shop(shop_name), request_priority(BACKGROUND):
+                async with contextlib.aclosing(iter_product_summaries(arguments)) as pages:
+                    async for products in pages:
+                        count += len(products)
+                        if stream_format == "sse":
+                            chunk = f"event: page\ndata: {encode_line({'products': products})}\n\n"
+                        else:
+                            chunk = "".join(f"{encode_line(product)}\n" for product in products)
+                        chunk = chunk.encode("utf-8")
+                        RESPONSE_BYTES.inc(len(chunk), format=stream_format)
+                        await response.write(chunk)
+        except ConnectionResetError:
+            raise
+        except Exception as e:
+            # Headers have already been sent, so report the error in the stream
+            if stream_format == "sse":
+                chunk = f"event: error\ndata: {encode_line({'error': str(e)})}\n\n"
+            else:
+                chunk = f"{encode_line({'error': str(e)})}\n"
+            await response.write(chunk.encode("utf-8"))
+        else:
+            if stream_format == "sse":
+                await response.write(f"event: end\ndata: {encode_line({'count': count})}\n\n".encode("utf-8"))
+        await response.write_eof()
+    except ConnectionResetError:
+        # The client closed the stream; there is no one left to report to
+        pass
+    return response
+
+@routes.post("/webhooks/shopify")
+async def http_handle_webhook(request):
+    """Handle Shopify webhook deliveries"""
+    body = await request.read()
+
+    # Deliveries are matched to a configured shop by their shop domain
+    shop = shop_registry.find_by_domain(request.headers.get(SHOP_DOMAIN_HEADER))
+    if shop is None:
+        if len(shop_registry.shops) > 1:
+            return web.json_response({"error": "Unknown shop"}, status=404)
+        shop = shop_registry.get()
+
+    if not verify_webhook_hmac(body, request.headers.get(HMAC_HEADER), shop.api_secret):
+        return web.json_response({"error": "Invalid webhook signature"}, status=401)
+
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        return web.json_response({"error": "Invalid webhook payload"}, status=400)
+
+    topic = request.headers.get(TOPIC_HEADER, "")
+    try:
+        with use_shop(shop.name):
+            handled = handle_product_webhook(topic, payload)
+    except ValueError as e:
+        return web.json_response({"error": str(e)}, status=400)
+    return web.json_response({"shop": shop.name, "topic": topic, "handled": handled})
+
+@routes.get("/metrics")
+async def http_handle_metrics(request):
+    """Expose metrics in the Prometheus text format"""
+    return web.Response(
+        body=metrics_registry.render().encode("utf-8"),
+        headers={"Content-Type": CONTENT_TYPE},
+    )
+
 @routes.get("/")
 async def handle_root(request):
     """Handle root request"""
@@ -41,10 +217,17 @@ async def handle_root(request):
         "description": "An MCP server that integrates with the Shopify API"
     })
 
+async def handle_cleanup(app):
+    """Close MCP sessions and the pooled Shopify client when the application shuts down"""
+    await mcp_transport.close()
+    await close_shopify_client()
+
 async def main():
     # Create the web application
     app = web.Application()
     app.add_routes(routes)
+    mcp_transport.add_routes(app, "/mcp")
+    app.on_cleanup.append(handle_cleanup)
     
     # Start the web server
     runner = web.AppRunner(app)
@@ -55,9 +238,15 @@ async def main():
     print(f"Server started on port {PORT}")
     print(f"MCP endpoint available at: http://localhost:{PORT}/mcp")
     
-    # Keep the server running
-    while True:
-        await asyncio.sleep(3600)
+    # Keep the server running until SIGTERM (sent by Railway) or Ctrl+C;
+    # cleanup closes the MCP sessions and the pooled Shopify clients
+    stopped = asyncio.Event()
+    with contextlib.suppress(NotImplementedError):
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stopped.set)
+    try:
+        await stopped.wait()
+    finally:
+        await runner.cleanup()
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
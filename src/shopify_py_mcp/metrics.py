@@ -0,0 +1,214 @@
+import bisect
+import re
+import time
+from contextlib import contextmanager
+
+# Content type of the Prometheus text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Latency buckets in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Buckets for the number of pages fetched by one listing
+PAGE_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+ID_PATTERN = re.compile(r"/\d+(?=/|\.json|$)")
+
+
+def format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    parts = []
+    for name, value in labels:
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{name}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def endpoint_label(path):
+    """
+    Reduce an API path to a low-cardinality endpoint name
+
+    Parameters:
+    path (str): API path or full URL, e.g. products/123.json?fields=id
+
+    Returns:
+    str: Endpoint name, e.g. products/{id}.json
+    """
+    path = path.split("?", 1)[0]
+    if "/admin/api/" in path:
+        path = path.split("/admin/api/", 1)[1].partition("/")[2]
+    return ID_PATTERN.sub("/{id}", "/" + path.lstrip("/")).lstrip("/")
+
+
+class Counter:
+    """Monotonically increasing value per label set"""
+
+    type = "counter"
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+
+    def _key(self, labels):
+        return tuple((name, labels.get(name, "")) for name in self.labelnames)
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def samples(self):
+        for key, value in self.values.items():
+            yield self.name, key, value
+
+
+class Histogram:
+    """Distribution of observed values per label set"""
+
+    type = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self.values = {}
+
+    def observe(self, value, **labels):
+        key = tuple((name, labels.get(name, "")) for name in self.labelnames)
+        entry = self.values.get(key)
+        if entry is None:
+            entry = self.values[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            entry["counts"][index] += 1
+        entry["sum"] += value
+        entry["count"] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the enclosed block"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self):
+        for key, entry in self.values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, entry["counts"]):
+                cumulative += count
+                yield f"{self.name}_bucket", key + (("le", format_value(bound)),), cumulative
+            yield f"{self.name}_bucket", key + (("le", "+Inf"),), entry["count"]
+            yield f"{self.name}_sum", key, entry["sum"]
+            yield f"{self.name}_count", key, entry["count"]
+
+
+class CallbackMetric:
+    """Metric whose values are read from a callback when metrics are rendered"""
+
+    def __init__(self, name, help, callback, type="gauge"):
+        self.name = name
+        self.help = help
+        self.callback = callback
+        self.type = type
+
+    def samples(self):
+        for labels, value in self.callback():
+            yield self.name, tuple(sorted(labels.items())), value
+
+
+class MetricsRegistry:
+    """Minimal registry rendering metrics in the Prometheus text format"""
+
+    def __init__(self):
+        self.metrics = {}
+
+    def register(self, metric):
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self.register(Counter(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def callback(self, name, help, callback, type="gauge"):
+        """
+        Register a metric read from a callback
+
+        Parameters:
+        name (str): Metric name
+        help (str): Description
+        callback (callable): Returns (labels dict, value) pairs
+        type (str): gauge or counter
+        """
+        return self.register(CallbackMetric(name, help, callback, type))
+
+    def render(self):
+        """Return all metrics in the Prometheus text exposition format"""
+        lines = []
+        for metric in self.metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{format_labels(labels)} {format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+TOOL_DURATION = registry.histogram(
+    "shopify_mcp_tool_duration_seconds",
+    "Duration of tool calls",
+    ("tool", "status"),
+)
+UPSTREAM_REQUESTS = registry.counter(
+    "shopify_mcp_upstream_requests_total",
+    "Requests sent to the Shopify Admin API",
+    ("shop", "method", "endpoint", "status"),
+)
+UPSTREAM_DURATION = registry.histogram(
+    "shopify_mcp_upstream_request_duration_seconds",
+    "Duration of requests to the Shopify Admin API",
+    ("shop", "method", "endpoint"),
+)
+UPSTREAM_BYTES = registry.counter(
+    "shopify_mcp_upstream_bytes_total",
+    "Bytes sent to and received from the Shopify Admin API",
+    ("shop", "direction"),
+)
+LISTING_PAGES = registry.histogram(
+    "shopify_mcp_listing_pages",
+    "Pages fetched by one multi-page product listing",
+    buckets=PAGE_BUCKETS,
+)
+SERIALIZATION_DURATION = registry.histogram(
+    "shopify_mcp_serialization_duration_seconds",
+    "Time spent serializing tool responses",
+    ("format",),
+)
+RESPONSE_BYTES = registry.counter(
+    "shopify_mcp_response_bytes_total",
+    "Bytes of serialized responses sent to clients",
+    ("format",),
+)
+SCHEDULER_WAIT = registry.histogram(
+    "shopify_mcp_scheduler_wait_seconds",
+    "Time requests waited for a call-limit bucket slot",
+    ("shop", "priority"),
+)
@@ -0,0 +1,389 @@
+import json
+import sqlite3
+import time
+from datetime import datetime
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    id INTEGER PRIMARY KEY,
+    title TEXT,
+    vendor TEXT,
+    product_type TEXT,
+    status TEXT,
+    tags TEXT,
+    created_at TEXT,
+    updated_at TEXT,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS variants (
+    id INTEGER PRIMARY KEY,
+    product_id INTEGER NOT NULL,
+    position INTEGER,
+    sku TEXT,
+    price TEXT,
+    inventory_quantity INTEGER,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS options (
+    id INTEGER PRIMARY KEY,
+    product_id INTEGER NOT NULL,
+    position INTEGER,
+    name TEXT,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS images (
+    id INTEGER PRIMARY KEY,
+    product_id INTEGER NOT NULL,
+    position INTEGER,
+    src TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS variants_product_id ON variants (product_id);
+CREATE INDEX IF NOT EXISTS variants_sku ON variants (sku);
+CREATE INDEX IF NOT EXISTS options_product_id ON options (product_id);
+CREATE INDEX IF NOT EXISTS images_product_id ON images (product_id);
+CREATE INDEX IF NOT EXISTS products_updated_at ON products (updated_at);
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# Nested collections stored in their own tables
+CHILD_TABLES = ("variants", "options", "images")
+
+
+def parse_timestamp(value):
+    """Parse an ISO 8601 timestamp (None if it is missing or malformed)"""
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class CatalogMirror:
+    """
+    Local SQLite mirror of products, variants, options and images
+
+    The database runs in WAL mode so reads are not blocked by syncs, and it
+    survives restarts so only changes made since the last sync have to be
+    downloaded again.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+    def get_state(self, key, default=None):
+        row = self.connection.execute(
+            "SELECT value FROM sync_state WHERE key = ?", (key,)
+        ).fetchone()
+        return row["value"] if row else default
+
+    def set_state(self, key, value):
+        self.connection.execute(
+            "INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)",
+            (key, None if value is None else str(value)),
+        )
+
+    @property
+    def is_synced(self):
+        """True once a full sync has completed"""
+        return self.get_state("full_sync_at") is not None
+
+    @property
+    def last_synced_at(self):
+        """Wall-clock time of the last successful sync (None if never synced)"""
+        value = self.get_state("synced_at")
+        return float(value) if value is not None else None
+
+    def age(self):
+        """Seconds since the last successful sync (None if never synced)"""
+        synced_at = self.last_synced_at
+        return None if synced_at is None else time.time() - synced_at
+
+    def upsert_products(self, products):
+        """
+        Insert or replace products and their nested resources
+
+        Parameters:
+        products (list): Complete product resources
+        """
+        with self.connection:
+            for product in products:
+                self._upsert_product(product)
+
+    def _upsert_product(self, product):
+        product_id = int(product["id"])
+        top_level = {k: v for k, v in product.items() if k not in CHILD_TABLES}
+        self.connection.execute(
+            "INSERT OR REPLACE INTO products (id, title, vendor, product_type, status,"
+            " tags, created_at, updated_at, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                product_id,
+                product.get("title"),
+                product.get("vendor"),
+                product.get("product_type"),
+                product.get("status"),
+                product.get("tags"),
+                product.get("created_at"),
+                product.get("updated_at"),
+                json.dumps(top_level, ensure_ascii=False),
+            ),
+        )
+
+        # Replace nested resources wholesale
+        for table in CHILD_TABLES:
+            self.connection.execute(
+                f"DELETE FROM {table} WHERE product_id = ?", (product_id,)
+            )
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO variants (id, product_id, position, sku, price,"
+            " inventory_quantity, data) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    variant["id"],
+                    product_id,
+                    variant.get("position", index + 1),
+                    variant.get("sku"),
+                    variant.get("price"),
+                    variant.get("inventory_quantity"),
+                    json.dumps(variant, ensure_ascii=False),
+                )
+                for index, variant in enumerate(product.get("variants") or [])
+                if variant.get("id") is not None
+            ],
+        )
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO options (id, product_id, position, name, data)"
+            " VALUES (?, ?, ?, ?, ?)",
+            [
+                (
+                    option["id"],
+                    product_id,
+                    option.get("position", index + 1),
+                    option.get("name"),
+                    json.dumps(option, ensure_ascii=False),
+                )
+                for index, option in enumerate(product.get("options") or [])
+                if option.get("id") is not None
+            ],
+        )
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO images (id, product_id, position, src, data)"
+            " VALUES (?, ?, ?, ?, ?)",
+            [
+                (
+                    image["id"],
+                    product_id,
+                    image.get("position", index + 1),
+                    image.get("src"),
+                    json.dumps(image, ensure_ascii=False),
+                )
+                for index, image in enumerate(product.get("images") or [])
+                if image.get("id") is not None
+            ],
+        )
+
+    def delete_product(self, product_id):
+        """Remove a product and its nested resources"""
+        product_id = int(product_id)
+        with self.connection:
+            self.connection.execute("DELETE FROM products WHERE id = ?", (product_id,))
+            for table in CHILD_TABLES:
+                self.connection.execute(
+                    f"DELETE FROM {table} WHERE product_id = ?", (product_id,)
+                )
+
+    def product_ids(self):
+        """Return the IDs of all mirrored products"""
+        return {row["id"] for row in self.connection.execute("SELECT id FROM products")}
+
+    def prune(self, keep_ids):
+        """Remove products whose IDs are not in keep_ids, in a single transaction"""
+        stale_ids = [(product_id,) for product_id in self.product_ids() - set(keep_ids)]
+        with self.connection:
+            self.connection.executemany("DELETE FROM products WHERE id = ?", stale_ids)
+            for table in CHILD_TABLES:
+                self.connection.executemany(
+                    f"DELETE FROM {table} WHERE product_id = ?", stale_ids
+                )
+        return len(stale_ids)
+
+    def _load_children(self, product_ids):
+        """Load nested resources for the given products, keyed by product ID"""
+        children = {product_id: {table: [] for table in CHILD_TABLES} for product_id in product_ids}
+        if not product_ids:
+            return children
+        placeholders = ",".join("?" * len(product_ids))
+        for table in CHILD_TABLES:
+            rows = self.connection.execute(
+                f"SELECT product_id, data FROM {table} WHERE product_id IN ({placeholders})"
+                " ORDER BY product_id, position, id",
+                list(product_ids),
+            )
+            for row in rows:
+                children[row["product_id"]][table].append(json.loads(row["data"]))
+        return children
+
+    def _build_products(self, rows):
+        products = [json.loads(row["data"]) for row in rows]
+        children = self._load_children([product["id"] for product in products])
+        for product in products:
+            product.update(children[product["id"]])
+        return products
+
+    def get_product(self, product_id):
+        """
+        Return a product from the mirror
+
+        Parameters:
+        product_id (int): Product ID
+
+        Returns:
+        dict: Product resource (None if it is not mirrored)
+        """
+        rows = self.connection.execute(
+            "SELECT data FROM products WHERE id = ?", (int(product_id),)
+        ).fetchall()
+        products = self._build_products(rows)
+        return products[0] if products else None
+
+    def get_products(self, product_ids):
+        """Return the mirrored products with the given IDs, ordered by ID"""
+        product_ids = [int(product_id) for product_id in product_ids]
+        if not product_ids:
+            return []
+        placeholders = ",".join("?" * len(product_ids))
+        rows = self.connection.execute(
+            f"SELECT data FROM products WHERE id IN ({placeholders}) ORDER BY id",
+            product_ids,
+        ).fetchall()
+        return self._build_products(rows)
+
+    def list_products(self, limit=50, after_id=None):
+        """
+        Return a page of products ordered by ID
+
+        Parameters:
+        limit (int): Number of products to return
+        after_id (int): Only return products with a larger ID
+
+        Returns:
+        list: Product resources
+        """
+        rows = self.connection.execute(
+            "SELECT data FROM products WHERE id > ? ORDER BY id LIMIT ?",
+            (int(after_id or 0), int(limit)),
+        ).fetchall()
+        return self._build_products(rows)
+
+    def iter_products(self, batch_size=500):
+        """Iterate over all mirrored products in ID order"""
+        after_id = None
+        while True:
+            products = self.list_products(batch_size, after_id)
+            yield from products
+            if len(products) < batch_size:
+                break
+            after_id = products[-1]["id"]
+
+    def count(self):
+        return self.connection.execute("SELECT COUNT(*) FROM products").fetchone()[0]
+
+
+# Product IDs requested per page when missing products are downloaded
+IDS_PER_PAGE = 250
+
+
+async def sync_mirror(mirror, iter_pages, full=False, count_products=None, iter_id_pages=None):
+    """
+    Bring the mirror up to date with Shopify
+
+    The first sync (or a forced full sync) downloads the whole catalog;
+    later syncs only request products updated since the newest updated_at
+    already mirrored. Deletions do not change updated_at, so after an
+    incremental pass the number of mirrored products is compared with
+    Shopify's count; if they differ, the IDs of the whole catalog are
+    listed to prune deleted products and download missing ones.
+
+    Parameters:
+    mirror (CatalogMirror): Mirror to update
+    iter_pages (callable): Returns an async iterator of product pages for the given filters
+    full (bool): Download the whole catalog even if the mirror has been synced before
+    count_products (callable): Returns the number of products in Shopify
+        (None to skip reconciling incremental syncs)
+    iter_id_pages (callable): Returns an async iterator of pages of products
+        holding only their IDs
+
+    Returns:
+    dict: Summary of the sync
+    """
+    started_at = time.time()
+    filters = {}
+    updated_at_min = mirror.get_state("max_updated_at")
+    incremental = not full and mirror.is_synced and updated_at_min is not None
+    if incremental:
+        filters["updated_at_min"] = updated_at_min
+
+    pages = 0
+    products_synced = 0
+    seen_ids = set()
+    latest_value = updated_at_min
+    latest = parse_timestamp(latest_value)
+    async for products in iter_pages(filters):
+        mirror.upsert_products(products)
+        pages += 1
+        products_synced += len(products)
+        for product in products:
+            seen_ids.add(int(product["id"]))
+            updated_at = parse_timestamp(product.get("updated_at"))
+            if updated_at is not None and (latest is None or updated_at > latest):
+                latest = updated_at
+                latest_value = product["updated_at"]
+
+    # A full pass also reveals products deleted since the previous sync
+    products_removed = 0
+    reconciled = False
+    if not incremental:
+        products_removed = mirror.prune(seen_ids)
+    elif count_products is not None and iter_id_pages is not None:
+        if await count_products() != mirror.count():
+            reconciled = True
+            shopify_ids = set()
+            async for products in iter_id_pages():
+                shopify_ids.update(int(product["id"]) for product in products)
+            products_removed = mirror.prune(shopify_ids)
+
+            missing_ids = sorted(shopify_ids - mirror.product_ids())
+            for start in range(0, len(missing_ids), IDS_PER_PAGE):
+                batch = missing_ids[start:start + IDS_PER_PAGE]
+                async for products in iter_pages({"ids": ",".join(map(str, batch))}):
+                    mirror.upsert_products(products)
+                    pages += 1
+                    products_synced += len(products)
+
+    # Only advance the sync point once every page has been stored
+    with mirror.connection:
+        mirror.set_state("max_updated_at", latest_value)
+        if not incremental:
+            mirror.set_state("full_sync_at", started_at)
+        mirror.set_state("synced_at", started_at)
+
+    return {
+        "mode": "incremental" if incremental else "full",
+        "pages": pages,
+        "products_synced": products_synced,
+        "products_removed": products_removed,
+        "reconciled": reconciled,
+        "products_total": mirror.count(),
+        "updated_at_min": filters.get("updated_at_min"),
+    }
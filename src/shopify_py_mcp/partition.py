@@ -0,0 +1,217 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from shopify_py_mcp.mirror import parse_timestamp
+from shopify_py_mcp.rate_limit import DEFAULT_BUCKET_SIZE
+
+# Upper bound on the number of partitions fetched at the same time
+MAX_PARTITIONS = 16
+
+# Each partition should hold at least this many pages, so that the probes
+# needed to plan the partitions pay for themselves
+MIN_PAGES_PER_PARTITION = 4
+
+# Count probes per partition used to find balanced boundaries
+SAMPLES_PER_PARTITION = 2
+
+# Filters that already restrict the ID or created_at range
+CONFLICTING_FILTERS = {"ids", "since_id", "created_at_min", "created_at_max"}
+
+
+def default_partitions(rate_limiter):
+    """
+    Return the number of partitions suited to a shop's rate budget
+
+    One partition per 10 requests of bucket capacity: 4 on standard shops
+    and the maximum of 16 on Shopify Plus.
+
+    Parameters:
+    rate_limiter (CallLimitBucket): Rate limiter of the shop's client
+
+    Returns:
+    int: Number of partitions
+    """
+    size = getattr(rate_limiter, "size", DEFAULT_BUCKET_SIZE)
+    return max(min(int(size) // 10, MAX_PARTITIONS), 2)
+
+
+def format_timestamp(value):
+    """Format a datetime as an ISO 8601 timestamp in UTC with second precision"""
+    return value.astimezone(timezone.utc).replace(microsecond=0).isoformat()
+
+
+def split_by_counts(samples, partitions):
+    """
+    Pick boundaries that split a range into parts holding similar numbers of items
+
+    Parameters:
+    samples (list): (datetime, items created up to then) pairs in time order,
+        the first holding no items and the last holding all of them
+    partitions (int): Number of parts
+
+    Returns:
+    list: Start of every part but the first, in increasing order with second
+        precision (fewer than partitions - 1 if the range is too narrow)
+    """
+    total = samples[-1][1]
+    boundaries = []
+    for part in range(1, partitions):
+        target = total * part / partitions
+        for (start, start_count), (end, end_count) in zip(samples, samples[1:]):
+            if end_count >= target:
+                # Assume items are spread evenly between two samples
+                share = 0
+                if end_count > start_count:
+                    share = (target - start_count) / (end_count - start_count)
+                boundary = (start + (end - start) * share).replace(microsecond=0)
+                break
+        else:
+            continue
+        if boundary > samples[0][0] and (not boundaries or boundary > boundaries[-1]):
+            boundaries.append(boundary)
+    return boundaries
+
+
+def partition_filters(filters, boundaries):
+    """
+    Build the query filters of the created_at partitions
+
+    created_at_min and created_at_max are both inclusive, so each partition
+    ends one second before the next one starts. The first and last
+    partitions are open-ended, which keeps products created before the
+    sampled range or while the catalog is fetched from falling through.
+
+    Parameters:
+    filters (dict): Filters shared by all partitions
+    boundaries (list): Start of every partition but the first
+
+    Returns:
+    list: Filters of each partition, oldest first
+    """
+    result = []
+    for index in range(len(boundaries) + 1):
+        partition = dict(filters)
+        if index > 0:
+            partition["created_at_min"] = format_timestamp(boundaries[index - 1])
+        if index < len(boundaries):
+            partition["created_at_max"] = format_timestamp(
+                boundaries[index] - timedelta(seconds=1)
+            )
+        result.append(partition)
+    return result
+
+
+async def plan_partitions(client, partitions=None, per_page=250, filters=None):
+    """
+    Split the product catalog into disjoint created_at ranges of similar size
+
+    products/count.json gives the size of the catalog, a since_id probe
+    finds the creation time of the first product, and count probes spread
+    over the range between then and now place the boundaries.
+
+    Parameters:
+    client (ShopifyClient): Client of the shop
+    partitions (int): Number of partitions (None to derive it from the rate budget)
+    per_page (int): Products per page
+    filters (dict): Query filters of the listing
+
+    Returns:
+    list: Filters of each partition (None if the catalog should be paged serially)
+    """
+    filters = dict(filters or {})
+    if CONFLICTING_FILTERS & filters.keys():
+        return None
+
+    response = await client.get("products/count.json", params=filters)
+    total = int(response.data.get("count", 0))
+    # The count response has updated the bucket size of the client
+    if partitions is None:
+        partitions = default_partitions(client.rate_limiter)
+    partitions = min(partitions, total // (per_page * MIN_PAGES_PER_PARTITION))
+    if partitions < 2:
+        return None
+
+    # since_id probe: products are listed by ID, so the first one marks the
+    # start of the catalog
+    response = await client.get(
+        "products.json",
+        params={**filters, "since_id": 0, "limit": 1, "fields": "id,created_at"},
+    )
+    products = response.data.get("products", [])
+    start = parse_timestamp(products[0].get("created_at")) if products else None
+    if start is None:
+        return None
+    if start.tzinfo is None:
+        start = start.replace(tzinfo=timezone.utc)
+    end = datetime.now(timezone.utc)
+    if end <= start:
+        return None
+
+    sample_count = partitions * SAMPLES_PER_PARTITION
+    times = [start + (end - start) * i / sample_count for i in range(1, sample_count)]
+
+    async def count_until(moment):
+        params = {**filters, "created_at_max": format_timestamp(moment)}
+        response = await client.get("products/count.json", params=params)
+        return int(response.data.get("count", 0))
+
+    counts = await asyncio.gather(*(count_until(moment) for moment in times))
+
+    # Counts taken while products are created or deleted may not be
+    # monotonic; the boundaries only need to be roughly balanced
+    samples = [(start, 0)]
+    for moment, count in zip(times, counts):
+        samples.append((moment, min(max(count, samples[-1][1]), total)))
+    samples.append((end, total))
+
+    boundaries = split_by_counts(samples, partitions)
+    if not boundaries:
+        return None
+    return partition_filters(filters, boundaries)
+
+
+async def iter_partition_pages(iter_pages, partitions):
+    """
+    Page through partitions concurrently
+
+    Each partition is paged serially by its own task; pages are yielded as
+    they arrive. The queue between the tasks and the consumer is bounded,
+    so a slow consumer holds back the fetches instead of buffering the
+    catalog.
+
+    Parameters:
+    iter_pages (callable): Returns an async iterator of product pages for the given filters
+    partitions (list): Filters of each partition
+
+    Yields:
+    tuple: (partition index, list of products)
+    """
+    queue = asyncio.Queue(maxsize=len(partitions) * 2)
+
+    async def fetch(index, filters):
+        try:
+            async for products in iter_pages(filters):
+                await queue.put((index, products, None))
+            await queue.put((index, None, None))
+        except Exception as e:
+            await queue.put((index, None, e))
+
+    tasks = [
+        asyncio.create_task(fetch(index, filters))
+        for index, filters in enumerate(partitions)
+    ]
+    remaining = len(tasks)
+    try:
+        while remaining:
+            index, products, error = await queue.get()
+            if error is not None:
+                raise error
+            if products is None:
+                remaining -= 1
+                continue
+            yield index, products
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
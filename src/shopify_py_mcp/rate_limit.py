@@ -0,0 +1,262 @@
+import asyncio
+import time
+
+# Header reporting the REST leaky bucket level, e.g. "32/40"
+CALL_LIMIT_HEADER = "X-Shopify-Shop-Api-Call-Limit"
+
+# Standard shops have a 40 request bucket leaking at 2 requests per second;
+# Plus shops have a 400 request bucket leaking at 20 requests per second.
+DEFAULT_BUCKET_SIZE = 40
+SECONDS_TO_DRAIN = 20
+
+# Requests are sent without delay until the bucket is this full
+DEFAULT_THRESHOLD = 0.8
+
+# Retry settings for throttled (429) responses
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_BACKOFF = 1.0
+MAX_BACKOFF = 30.0
+
+
+def parse_call_limit(header):
+    """
+    Parse the X-Shopify-Shop-Api-Call-Limit header
+
+    Parameters:
+    header (str): Header value such as "32/40"
+
+    Returns:
+    tuple: (used, bucket size), or None if the header is missing or malformed
+    """
+    if not header:
+        return None
+    try:
+        used, size = header.split("/", 1)
+        return int(used), int(size)
+    except ValueError:
+        return None
+
+
+def parse_retry_after(header):
+    """
+    Parse the Retry-After header
+
+    Parameters:
+    header (str): Header value in seconds
+
+    Returns:
+    float: Seconds to wait, or None if the header is missing or malformed
+    """
+    if not header:
+        return None
+    try:
+        return max(float(header), 0.0)
+    except ValueError:
+        return None
+
+
+def backoff_delay(attempt, retry_after=None):
+    """
+    Return the delay before retrying a throttled request
+
+    Parameters:
+    attempt (int): Zero-based retry attempt
+    retry_after (float): Delay requested by the server, if any
+
+    Returns:
+    float: Seconds to wait
+    """
+    if retry_after is not None:
+        return retry_after
+    return min(DEFAULT_BACKOFF * (2**attempt), MAX_BACKOFF)
+
+
+class CallLimitBucket:
+    """
+    Client-side model of Shopify's leaky bucket
+
+    The bucket level is estimated locally, corrected from the call limit
+    header of every response, and drained at the shop's leak rate. Requests
+    pass straight through while there is headroom and are only delayed once
+    the bucket gets close to full.
+
+    Requests that have reserved a slot but whose response has not arrived
+    yet are tracked separately, so a header can both raise and lower the
+    estimate without losing their reservations.
+    """
+
+    def __init__(self, size=DEFAULT_BUCKET_SIZE, threshold=DEFAULT_THRESHOLD):
+        self.size = size
+        self.threshold = threshold
+        self.level = 0.0
+        self.in_flight = 0
+        self.updated_at = time.monotonic()
+        self.paused_until = 0.0
+        self.throttled_count = 0
+
+    @property
+    def leak_rate(self):
+        """Requests drained from the bucket per second"""
+        return self.size / SECONDS_TO_DRAIN
+
+    def current_level(self, now=None):
+        """Return the estimated bucket level after leaking"""
+        now = time.monotonic() if now is None else now
+        elapsed = now - self.updated_at
+        return max(self.level - elapsed * self.leak_rate, 0.0)
+
+    def reserve(self):
+        """Reserve a slot, returning 0 on success or the seconds to wait"""
+        now = time.monotonic()
+        if now < self.paused_until:
+            return self.paused_until - now
+
+        level = self.current_level(now)
+        limit = self.size * self.threshold
+        if level + 1 <= limit:
+            self.level = level + 1
+            self.updated_at = now
+            self.in_flight += 1
+            return 0
+        return (level + 1 - limit) / self.leak_rate
+
+    def release(self):
+        """Return a reserved slot that was not used"""
+        self.level = max(self.level - 1, 0.0)
+        self.in_flight = max(self.in_flight - 1, 0)
+
+    async def acquire(self):
+        """Wait until a request can be sent without exhausting the bucket"""
+        while True:
+            delay = self.reserve()
+            if delay <= 0:
+                return
+            await asyncio.sleep(delay)
+
+    def finish(self, headers=None):
+        """
+        Record the end of a request sent with a reserved slot
+
+        Parameters:
+        headers (Mapping): Response headers (None if no response arrived)
+        """
+        self.in_flight = max(self.in_flight - 1, 0)
+        if headers is not None:
+            self.update(headers)
+
+    def update(self, headers):
+        """
+        Correct the bucket estimate from response headers
+
+        Parameters:
+        headers (Mapping): Response headers
+        """
+        call_limit = parse_call_limit(headers.get(CALL_LIMIT_HEADER))
+        if call_limit is None:
+            return
+        used, size = call_limit
+        # The header counts the requests Shopify has seen; requests still in
+        # flight are added on top, so the estimate can drop as well as rise
+        self.level = float(used + self.in_flight)
+        self.size = size
+        self.updated_at = time.monotonic()
+
+    def throttled(self, retry_after):
+        """
+        Record a 429 response and pause all requests for the given delay
+
+        Parameters:
+        retry_after (float): Seconds until requests may be sent again
+        """
+        now = time.monotonic()
+        self.throttled_count += 1
+        # The pause covers the wait; afterwards let a single request through
+        # and rely on its call limit header to correct the estimate
+        self.level = max(self.size * self.threshold - 1, 0.0)
+        self.updated_at = now
+        self.paused_until = max(self.paused_until, now + retry_after)
+
+
+class GraphQLCostBucket:
+    """
+    Client-side model of Shopify's GraphQL cost bucket
+
+    The GraphQL Admin API limits query cost in a bucket of its own, separate
+    from the REST call limit, and reports it in the extensions.cost member
+    of every response. A throttled query pauses GraphQL requests only, for
+    as long as the bucket needs to restore the points the query asked for.
+    """
+
+    def __init__(self):
+        # Unknown until the first response reports the bucket
+        self.available = None
+        self.maximum = None
+        self.restore_rate = None
+        self.updated_at = time.monotonic()
+        self.paused_until = 0.0
+        self.throttled_count = 0
+
+    def current_available(self, now=None):
+        """Return the estimated points available after restoring (None if unknown)"""
+        if self.available is None:
+            return None
+        now = time.monotonic() if now is None else now
+        restored = self.available + (now - self.updated_at) * (self.restore_rate or 0.0)
+        return min(restored, self.maximum) if self.maximum else restored
+
+    async def acquire(self):
+        """Wait until a throttled query has had time to restore its points"""
+        while True:
+            delay = self.paused_until - time.monotonic()
+            if delay <= 0:
+                return
+            await asyncio.sleep(delay)
+
+    def update(self, cost):
+        """
+        Correct the estimate from the cost report of a response
+
+        Parameters:
+        cost (dict): extensions.cost member of a GraphQL response (None if missing)
+        """
+        status = (cost or {}).get("throttleStatus") if isinstance(cost, dict) else None
+        if not isinstance(status, dict):
+            return
+        try:
+            self.available = float(status["currentlyAvailable"])
+            self.maximum = float(status["maximumAvailable"])
+            self.restore_rate = float(status["restoreRate"])
+        except (KeyError, TypeError, ValueError):
+            return
+        self.updated_at = time.monotonic()
+
+    def throttle_delay(self, cost, attempt):
+        """
+        Return the delay before retrying a throttled query
+
+        Parameters:
+        cost (dict): extensions.cost member of the throttled response
+        attempt (int): Zero-based retry attempt
+
+        Returns:
+        float: Seconds until the bucket holds the points the query requested
+            (exponential backoff if the response did not report them)
+        """
+        available = self.current_available()
+        try:
+            requested = float(cost["requestedQueryCost"])
+        except (KeyError, TypeError, ValueError):
+            requested = None
+        if available is None or requested is None or not self.restore_rate:
+            return backoff_delay(attempt)
+        return min(max(requested - available, 0.0) / self.restore_rate, MAX_BACKOFF)
+
+    def throttled(self, retry_after):
+        """
+        Record a throttled query and pause GraphQL requests for the given delay
+
+        Parameters:
+        retry_after (float): Seconds until queries may be sent again
+        """
+        self.throttled_count += 1
+        self.paused_until = max(self.paused_until, time.monotonic() + retry_after)
@@ -0,0 +1,192 @@
+import asyncio
+import collections
+import contextvars
+import time
+from contextlib import contextmanager
+
+from shopify_py_mcp.metrics import SCHEDULER_WAIT
+
+# Priority classes of upstream requests and their shares of the rate budget
+# while requests are queued
+INTERACTIVE = "interactive"
+WRITE = "write"
+BACKGROUND = "background"
+DEFAULT_WEIGHTS = {INTERACTIVE: 16, WRITE: 4, BACKGROUND: 1}
+
+_current_priority = contextvars.ContextVar("request_priority", default=INTERACTIVE)
+
+
+def parse_weights(value):
+    """
+    Parse priority class weights
+
+    Parameters:
+    value (str): Weights such as "interactive=16,write=4,background=1"; missing
+        classes keep their default weight
+
+    Returns:
+    dict: Weight of each priority class
+    """
+    weights = dict(DEFAULT_WEIGHTS)
+    for item in (value or "").split(","):
+        if not item.strip():
+            continue
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in weights:
+            raise ValueError(f"Unknown request priority: {name}")
+        weights[name] = float(weight)
+        if weights[name] <= 0:
+            raise ValueError(f"The weight of {name} requests must be positive")
+    return weights
+
+
+def current_priority():
+    """Return the priority class of requests sent from the running task"""
+    return _current_priority.get()
+
+
+@contextmanager
+def request_priority(priority):
+    """
+    Send the upstream requests of the enclosed block with the given priority
+
+    Parameters:
+    priority (str): interactive, write or background
+    """
+    if priority not in DEFAULT_WEIGHTS:
+        raise ValueError(f"Unknown request priority: {priority}")
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+class PriorityScheduler:
+    """
+    Weighted fair queuing of upstream requests in front of the call-limit bucket
+
+    While the bucket has room, requests go straight through. Once it is
+    full, requests wait in one FIFO queue per priority class and a single
+    dispatcher hands out bucket slots as they free up. The slots are shared
+    out in proportion to the class weights (self-clocked fair queuing), so a
+    long export cannot starve an interactive read, and background work
+    still makes progress while interactive reads keep arriving.
+    """
+
+    def __init__(self, rate_limiter, weights=None, shop_label=""):
+        self.rate_limiter = rate_limiter
+        self.weights = dict(weights or DEFAULT_WEIGHTS)
+        self.shop_label = shop_label
+        self.queues = {name: collections.deque() for name in self.weights}
+        # Finish tags of the fair queuing clock
+        self.virtual_time = 0.0
+        self.finish_tags = {name: 0.0 for name in self.weights}
+        self.counters = {
+            name: {"requests": 0, "queued": 0, "max_depth": 0, "wait_seconds": 0.0}
+            for name in self.weights
+        }
+        self._dispatcher = None
+        self._wakeup = None
+
+    def queued(self):
+        return sum(len(queue) for queue in self.queues.values())
+
+    async def acquire(self, priority=None):
+        """
+        Wait for a slot in the call-limit bucket
+
+        Parameters:
+        priority (str): Priority class (the class of the running task by default)
+        """
+        priority = priority or current_priority()
+        if priority not in self.queues:
+            priority = INTERACTIVE
+        counters = self.counters[priority]
+        counters["requests"] += 1
+
+        # Fast path: nobody is waiting and the bucket has room
+        if not self.queued() and self.rate_limiter.reserve() <= 0:
+            SCHEDULER_WAIT.observe(0.0, shop=self.shop_label, priority=priority)
+            return
+
+        tag = max(self.virtual_time, self.finish_tags[priority]) + 1 / self.weights[priority]
+        self.finish_tags[priority] = tag
+        future = asyncio.get_running_loop().create_future()
+        queue = self.queues[priority]
+        queue.append((tag, future))
+        counters["queued"] += 1
+        counters["max_depth"] = max(counters["max_depth"], len(queue))
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.ensure_future(self._dispatch())
+
+        started = time.perf_counter()
+        try:
+            await future
+        except asyncio.CancelledError:
+            # Cancelled after the dispatcher handed over a slot: return it
+            if future.done() and not future.cancelled():
+                self.rate_limiter.release()
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            counters["wait_seconds"] += waited
+            SCHEDULER_WAIT.observe(waited, shop=self.shop_label, priority=priority)
+
+    def wake(self):
+        """Let the dispatcher re-check the bucket, e.g. after its estimate was corrected"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _next(self):
+        """Return the queue whose head has the lowest finish tag (None if all are empty)"""
+        best = None
+        for queue in self.queues.values():
+            # Callers that gave up while waiting leave cancelled futures behind
+            while queue and queue[0][1].done():
+                queue.popleft()
+            if queue and (best is None or queue[0][0] < best[0][0]):
+                best = queue
+        return best
+
+    async def _dispatch(self):
+        """Hand out bucket slots to waiting requests until the queues are empty"""
+        self._wakeup = asyncio.Event()
+        while True:
+            if self._next() is None:
+                return
+            delay = self.rate_limiter.reserve()
+            if delay > 0:
+                # Responses may reveal a larger or emptier bucket than estimated,
+                # so stop waiting as soon as the estimate is corrected
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            # Pick the request after the slot is reserved, so that requests
+            # queued during the wait compete for it
+            queue = self._next()
+            if queue is None:
+                # Everybody gave up; return the slot
+                self.rate_limiter.release()
+                return
+            tag, future = queue.popleft()
+            self.virtual_time = tag
+            future.set_result(None)
+
+    def stats(self):
+        """Return queue depth and wait statistics per priority class"""
+        result = {}
+        for name, counters in self.counters.items():
+            result[name] = {
+                "weight": self.weights[name],
+                "depth": len(self.queues[name]),
+                **counters,
+                "average_wait": (
+                    counters["wait_seconds"] / counters["queued"] if counters["queued"] else 0.0
+                ),
+            }
+        return result
@@ -0,0 +1,229 @@
+import html
+import re
+from collections import Counter
+
+TOKEN_PATTERN = re.compile(r"\w+")
+TAG_PATTERN = re.compile(r"<[^>]+>")
+
+# Fields that can be used as facets and filters
+FACET_FIELDS = ("vendor", "product_type", "status", "tags")
+
+# Extra weight of query terms found in the title
+TITLE_WEIGHT = 3
+
+
+def tokenize(text):
+    """Split text into lowercase word tokens"""
+    if not text:
+        return []
+    return TOKEN_PATTERN.findall(str(text).lower())
+
+
+def html_to_text(body_html):
+    """Strip tags and entities from an HTML fragment"""
+    if not body_html:
+        return ""
+    return html.unescape(TAG_PATTERN.sub(" ", body_html))
+
+
+def split_tags(tags):
+    """Split Shopify's comma-separated tags string into a list"""
+    if not tags:
+        return []
+    if isinstance(tags, list):
+        return [tag.strip() for tag in tags if tag and tag.strip()]
+    return [tag.strip() for tag in tags.split(",") if tag.strip()]
+
+
+def normalize(value):
+    return str(value).strip().lower() if value is not None else ""
+
+
+class ProductIndex:
+    """
+    In-memory inverted index over the product catalog
+
+    Products are indexed by the words of their title, body text, vendor,
+    product type, tags, status and variant SKUs, and by exact facet values,
+    so searches and facet counts never call the Shopify API.
+    """
+
+    def __init__(self):
+        self.documents = {}
+        self.postings = {}
+        self.facets = {field: {} for field in FACET_FIELDS}
+        # True once the index has been built from the whole catalog
+        self.complete = False
+
+    def __len__(self):
+        return len(self.documents)
+
+    def add(self, product):
+        """
+        Index (or re-index) a complete product
+
+        Parameters:
+        product (dict): Product resource
+        """
+        product_id = int(product["id"])
+        self.remove(product_id)
+
+        tags = split_tags(product.get("tags"))
+        skus = [
+            variant.get("sku")
+            for variant in product.get("variants") or []
+            if variant.get("sku")
+        ]
+
+        title_tokens = tokenize(product.get("title"))
+        tokens = set(title_tokens)
+        tokens.update(tokenize(html_to_text(product.get("body_html"))))
+        tokens.update(tokenize(product.get("vendor")))
+        tokens.update(tokenize(product.get("product_type")))
+        tokens.update(tokenize(product.get("status")))
+        for tag in tags:
+            tokens.update(tokenize(tag))
+        for sku in skus:
+            # Whole SKUs are searchable as well as their parts
+            tokens.add(normalize(sku))
+            tokens.update(tokenize(sku))
+
+        facet_values = {
+            "vendor": [product.get("vendor")] if product.get("vendor") else [],
+            "product_type": [product.get("product_type")] if product.get("product_type") else [],
+            "status": [product.get("status")] if product.get("status") else [],
+            "tags": tags,
+        }
+
+        self.documents[product_id] = {
+            "summary": {
+                "id": product_id,
+                "title": product.get("title"),
+                "vendor": product.get("vendor"),
+                "product_type": product.get("product_type"),
+                "status": product.get("status"),
+                "tags": product.get("tags"),
+                "skus": skus,
+            },
+            "tokens": tokens,
+            "title_tokens": set(title_tokens),
+            "facets": facet_values,
+        }
+        for token in tokens:
+            self.postings.setdefault(token, set()).add(product_id)
+        for field, values in facet_values.items():
+            for value in values:
+                self.facets[field].setdefault(normalize(value), set()).add(product_id)
+
+    def remove(self, product_id):
+        """Remove a product from the index"""
+        product_id = int(product_id)
+        document = self.documents.pop(product_id, None)
+        if document is None:
+            return
+        for token in document["tokens"]:
+            ids = self.postings.get(token)
+            if ids is not None:
+                ids.discard(product_id)
+                if not ids:
+                    del self.postings[token]
+        for field, values in document["facets"].items():
+            for value in values:
+                ids = self.facets[field].get(normalize(value))
+                if ids is not None:
+                    ids.discard(product_id)
+                    if not ids:
+                        del self.facets[field][normalize(value)]
+
+    def clear(self):
+        self.documents.clear()
+        self.postings.clear()
+        self.facets = {field: {} for field in FACET_FIELDS}
+        self.complete = False
+
+    def search(self, query="", filters=None, limit=50, offset=0):
+        """
+        Search the index
+
+        Parameters:
+        query (str): Terms that must all match
+        filters (dict): Facet filters; tags must all be present, other facets match exactly
+        limit (int): Maximum number of products to return
+        offset (int): Number of matching products to skip
+
+        Returns:
+        dict: Total match count, matching product summaries and facet counts
+        """
+        matches = None
+
+        # Every query term must match
+        for term in set(normalize(query).split()):
+            ids = self.term_matches(term)
+            if ids is None:
+                continue
+            matches = set(ids) if matches is None else matches & ids
+            if not matches:
+                break
+
+        for field, value in (filters or {}).items():
+            if field not in FACET_FIELDS or value in (None, "", []):
+                continue
+            values = split_tags(value) if field == "tags" else [value]
+            for item in values:
+                ids = self.facets[field].get(normalize(item), set())
+                matches = set(ids) if matches is None else matches & ids
+
+        if matches is None:
+            matches = set(self.documents)
+
+        # Rank by the number of query words found in the title
+        query_tokens = set(tokenize(query))
+        ranked = sorted(
+            matches,
+            key=lambda product_id: (
+                -TITLE_WEIGHT
+                * len(query_tokens & self.documents[product_id]["title_tokens"]),
+                product_id,
+            ),
+        )
+
+        return {
+            "total": len(ranked),
+            "products": [
+                self.documents[product_id]["summary"]
+                for product_id in ranked[offset : offset + limit]
+            ],
+            "facets": self.facet_counts(matches),
+        }
+
+    def term_matches(self, term):
+        """
+        Return the products matching a whitespace-delimited query term
+
+        A term that matches a whole SKU (such as SKU-12-3) only matches
+        products with that SKU; other terms match products containing all
+        of their words.
+
+        Parameters:
+        term (str): Lowercase query term
+
+        Returns:
+        set: Matching product IDs (None if the term holds no words)
+        """
+        if term in self.postings:
+            return self.postings[term]
+        tokens = tokenize(term)
+        if not tokens:
+            return None
+        ids = set(self.postings.get(tokens[0], set()))
+        for token in tokens[1:]:
+            ids &= self.postings.get(token, set())
+        return ids
+
+    def facet_counts(self, product_ids):
+        """Count facet values over the given products"""
+        counts = {field: Counter() for field in FACET_FIELDS}
+        for product_id in product_ids:
+            for field, values in self.documents[product_id]["facets"].items():
+                counts[field].update(values)
+        return {field: dict(counter.most_common()) for field, counter in counts.items()}
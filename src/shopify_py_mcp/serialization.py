@@ -0,0 +1,111 @@
+import json
+
+# orjson is optional; it is used for compact output when it is installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# pretty: indented JSON, compact: no whitespace, table: compact with lists of
+# objects turned into columns and rows
+RESPONSE_FORMATS = ("pretty", "compact", "table")
+
+# auto: orjson when installed, json: always the standard library
+JSON_ENCODERS = ("auto", "json", "orjson")
+
+
+def to_table(items):
+    """
+    Turn a list of objects into columns and rows so keys are not repeated
+
+    Parameters:
+    items (list): Objects to convert
+
+    Returns:
+    dict: Column names (in first-seen order) and one row of values per object
+    """
+    columns = {}
+    for item in items:
+        for key in item:
+            columns.setdefault(key, None)
+    columns = list(columns)
+    return {
+        "columns": columns,
+        "rows": [[item.get(column) for column in columns] for item in items],
+    }
+
+
+def is_object_list(value):
+    return (
+        isinstance(value, list)
+        and bool(value)
+        and all(isinstance(item, dict) for item in value)
+    )
+
+
+def tabulate(data):
+    """
+    Convert lists of objects at the top level of a result into tables
+
+    Parameters:
+    data: Tool result
+
+    Returns:
+    Result with object lists in columnar layout
+    """
+    if is_object_list(data):
+        return to_table(data)
+    if isinstance(data, dict):
+        return {
+            key: to_table(value) if is_object_list(value) else value
+            for key, value in data.items()
+        }
+    return data
+
+
+def check_format(response_format, encoder="auto"):
+    """
+    Check that a response format and JSON encoder can be used
+
+    Parameters:
+    response_format (str): One of RESPONSE_FORMATS
+    encoder (str): One of JSON_ENCODERS
+    """
+    if response_format not in RESPONSE_FORMATS:
+        raise ValueError(
+            f"Unknown response format: {response_format} "
+            f"(expected one of {', '.join(RESPONSE_FORMATS)})"
+        )
+    if encoder not in JSON_ENCODERS:
+        raise ValueError(f"Unknown JSON encoder: {encoder}")
+    if encoder == "orjson" and orjson is None:
+        raise ValueError("The orjson encoder is not installed")
+
+
+def dumps(data, response_format="pretty", encoder="auto"):
+    """
+    Serialize a tool result
+
+    Parameters:
+    data: Result to serialize
+    response_format (str): One of RESPONSE_FORMATS
+    encoder (str): One of JSON_ENCODERS
+
+    Returns:
+    str: Serialized result
+    """
+    check_format(response_format, encoder)
+
+    if response_format == "table":
+        data = tabulate(data)
+
+    use_orjson = orjson is not None and encoder != "json"
+    if use_orjson:
+        option = orjson.OPT_NON_STR_KEYS
+        if response_format == "pretty":
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, option=option).decode("utf-8")
+
+    if response_format == "pretty":
+        return json.dumps(data, indent=2, ensure_ascii=False)
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
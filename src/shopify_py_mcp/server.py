@@ -1,102 +1,382 @@
 import asyncio
+import contextlib
+import contextvars
+import copy
+import importlib
 import os
-import json
-import shopify
+import sys
 import time
+from datetime import datetime
 
 from mcp.server.models import InitializationOptions
 import mcp.types as types
 from mcp.server import NotificationOptions, Server
-from pydantic import AnyUrl
-import mcp.server.stdio
+
+from shopify_py_mcp.bulk_export import (
+    DEFAULT_EXPORT_TIMEOUT,
+    export_catalog,
+    resolve_export_path,
+)
+from shopify_py_mcp.client import ShopifyAPIError
+from shopify_py_mcp.metrics import (
+    LISTING_PAGES,
+    RESPONSE_BYTES,
+    SERIALIZATION_DURATION,
+    TOOL_DURATION,
+    registry as metrics_registry,
+)
+from shopify_py_mcp.mirror import sync_mirror
+from shopify_py_mcp.partition import iter_partition_pages, plan_partitions
+from shopify_py_mcp.scheduler import (
+    BACKGROUND,
+    INTERACTIVE,
+    WRITE,
+    parse_weights,
+    request_priority,
+)
+from shopify_py_mcp.search import FACET_FIELDS
+from shopify_py_mcp.serialization import RESPONSE_FORMATS, check_format, dumps
+from shopify_py_mcp.shops import Shop, ShopRegistry, load_shop_config
+from shopify_py_mcp.tracing import configure_tracing, span
+from shopify_py_mcp.variants import (
+    VARIANTS_BULK_UPDATE_MUTATION,
+    apply_variant_changes,
+    plan_variant_updates,
+    product_gid,
+    to_bulk_input,
+)
 
 # Shopify API settings
 SHOP_URL = os.environ.get("SHOPIFY_SHOP_URL", "")
-API_KEY = os.environ.get("SHOPIFY_API_KEY", "")
-API_PASSWORD = os.environ.get("SHOPIFY_API_PASSWORD", "")
 API_VERSION = os.environ.get("SHOPIFY_API_VERSION", "2025-01")
 API_SECRET = os.environ.get("SHOPIFY_API_SECRET", "")
 ADMIN_ACCESS_TOKEN = os.environ.get("SHOPIFY_ADMIN_ACCESS_TOKEN", "")
 
+# Product cache settings
+PRODUCT_CACHE_TTL = float(os.environ.get("SHOPIFY_PRODUCT_CACHE_TTL", 60))
+PRODUCT_CACHE_SIZE = int(os.environ.get("SHOPIFY_PRODUCT_CACHE_SIZE", 1000))
+
+# Number of items bulk tools process at the same time
+BULK_CONCURRENCY = int(os.environ.get("SHOPIFY_BULK_CONCURRENCY", 4))
+
+# Partitions fetched concurrently by full-catalog reads (0 derives it from
+# the shop's rate budget, 1 pages serially)
+LISTING_PARTITIONS = int(os.environ.get("SHOPIFY_LISTING_PARTITIONS", 0))
+
+# Shares of the rate budget per request priority class while requests queue
+PRIORITY_WEIGHTS = parse_weights(os.environ.get("SHOPIFY_PRIORITY_WEIGHTS", ""))
+
+# Catalog mirror settings (the mirror is disabled unless a path is set)
+MIRROR_PATH = os.environ.get("SHOPIFY_MIRROR_PATH", "")
+MIRROR_MAX_AGE = float(os.environ.get("SHOPIFY_MIRROR_MAX_AGE", 300))
+
+# Directory export_catalog may write files to (exports to files are disabled if unset)
+EXPORT_DIR = os.environ.get("SHOPIFY_EXPORT_DIR", "")
+
+# Additional shops: a JSON object keyed by shop name, or the path of a JSON file
+SHOPS_CONFIG = os.environ.get("SHOPIFY_SHOPS", "")
+DEFAULT_SHOP = os.environ.get("SHOPIFY_DEFAULT_SHOP", "")
+
+# Tool response settings (pretty, compact or table; auto, json or orjson)
+RESPONSE_FORMAT = os.environ.get("SHOPIFY_RESPONSE_FORMAT", "pretty")
+JSON_ENCODER = os.environ.get("SHOPIFY_JSON_ENCODER", "auto")
+check_format(RESPONSE_FORMAT, JSON_ENCODER)
+
+# File traces are written to in the OTLP JSON format (tracing is off if unset)
+TRACE_FILE = os.environ.get("SHOPIFY_TRACE_FILE", "")
+configure_tracing(TRACE_FILE)
+
+
+def create_shop_registry():
+    """
+    Build the registry of shops served by this process
+
+    The shop configured with SHOPIFY_SHOP_URL and SHOPIFY_ADMIN_ACCESS_TOKEN
+    is registered as "default"; SHOPIFY_SHOPS adds more shops.
+
+    Returns:
+    ShopRegistry: Configured shops
+    """
+    registry = ShopRegistry()
+    config = load_shop_config(SHOPS_CONFIG)
+    if SHOP_URL or not config:
+        registry.add(
+            Shop(
+                "default",
+                SHOP_URL,
+                ADMIN_ACCESS_TOKEN,
+                API_VERSION,
+                api_secret=API_SECRET,
+                mirror_path=MIRROR_PATH,
+                cache_ttl=PRODUCT_CACHE_TTL,
+                cache_size=PRODUCT_CACHE_SIZE,
+                client_options={"priority_weights": PRIORITY_WEIGHTS},
+            )
+        )
+    for name, settings in config.items():
+        registry.add(
+            Shop(
+                name,
+                settings["shop_url"],
+                settings["access_token"],
+                settings.get("api_version", API_VERSION),
+                api_secret=settings.get("api_secret", API_SECRET),
+                mirror_path=settings.get("mirror_path", ""),
+                cache_ttl=float(settings.get("cache_ttl", PRODUCT_CACHE_TTL)),
+                cache_size=int(settings.get("cache_size", PRODUCT_CACHE_SIZE)),
+                client_options={"priority_weights": PRIORITY_WEIGHTS},
+            ),
+            default=name == DEFAULT_SHOP,
+        )
+    return registry
+
+
+shop_registry = create_shop_registry()
+
+# Shop that the running tool call works on
+_current_shop = contextvars.ContextVar("current_shop", default=None)
+
+
+def get_shop():
+    """Return the shop of the running tool call (the default shop outside of one)"""
+    return _current_shop.get() or shop_registry.get()
+
+
+@contextlib.contextmanager
+def use_shop(name=None):
+    """
+    Run the enclosed code against a shop
+
+    The selection is held in a context variable, so concurrent tool calls
+    for different shops do not affect each other, and tasks started inside
+    the block inherit it.
+
+    Parameters:
+    name (str): Shop name (None for the default shop)
+    """
+    token = _current_shop.set(shop_registry.get(name))
+    try:
+        yield
+    finally:
+        _current_shop.reset(token)
+
+
+def get_shopify_client():
+    """Return the shared async Shopify API client of the current shop"""
+    return get_shop().client
+
+
+def collect_shop_metrics(read):
+    """Return a metrics callback reading one value per shop"""
+    return lambda: [
+        ({"shop": shop.name}, read(shop)) for shop in shop_registry.shops.values()
+    ]
 
-# Initialize Shopify API
-def initialize_shopify_api():
-    shopify.Session.setup(api_key=API_KEY, secret=API_SECRET)
-    shop_url = f"https://{SHOP_URL}"
-    session = shopify.Session(shop_url, API_VERSION, ADMIN_ACCESS_TOKEN)
-    shopify.ShopifyResource.activate_session(session)
+
+metrics_registry.callback(
+    "shopify_mcp_call_limit_bucket_level",
+    "Estimated fill level of the REST call-limit bucket",
+    collect_shop_metrics(lambda shop: shop.client.rate_limiter.current_level()),
+)
+metrics_registry.callback(
+    "shopify_mcp_call_limit_bucket_size",
+    "Size of the REST call-limit bucket",
+    collect_shop_metrics(lambda shop: shop.client.rate_limiter.size),
+)
+metrics_registry.callback(
+    "shopify_mcp_throttled_total",
+    "Requests throttled by Shopify",
+    collect_shop_metrics(lambda shop: shop.client.rate_limiter.throttled_count),
+    type="counter",
+)
+metrics_registry.callback(
+    "shopify_mcp_cache_hit_ratio",
+    "Product cache hit ratio",
+    collect_shop_metrics(lambda shop: shop.cache.stats()["hit_rate"]),
+)
+metrics_registry.callback(
+    "shopify_mcp_coalesce_ratio",
+    "Share of upstream reads served by an identical in-flight request",
+    collect_shop_metrics(lambda shop: shop.client.coalescer.stats()["coalesce_rate"]),
+)
+metrics_registry.callback(
+    "shopify_mcp_scheduler_queue_depth",
+    "Requests waiting for a call-limit bucket slot",
+    lambda: [
+        ({"shop": shop.name, "priority": priority}, len(queue))
+        for shop in shop_registry.shops.values()
+        for priority, queue in shop.client.scheduler.queues.items()
+    ],
+)
+
+
+async def close_shopify_client():
+    """Close the async Shopify API clients of all shops"""
+    await shop_registry.close()
 
 
 server = Server("shopify-py-mcp")
 
 
-def get_all_shopify_products(total_limit=None, per_page_limit=250):
+async def iter_shopify_product_pages(
+    total_limit=None, per_page_limit=250, fields=None, filters=None
+):
     """
-    Function to retrieve product listings across multiple pages using the Shopify API library
+    Function to iterate over product pages using cursor-based pagination
 
     Parameters:
     total_limit (int): Total number of products to retrieve (None to retrieve all products)
     per_page_limit (int): Number of products per request (maximum 250)
+    fields (list): Product fields to retrieve (None for all fields)
+    filters (dict): Additional query filters such as updated_at_min
 
-    Returns:
-    list: List of products
+    Yields:
+    list: Products of each page
     """
     # Limit per page to 250
     per_page_limit = min(per_page_limit, 250)
 
-    all_products = []
-    next_page_url = None
+    retrieved = 0
+    page_info = None
+    pages = 0
 
     try:
         while True:
             # Check if enough products have already been retrieved
-            if total_limit is not None and len(all_products) >= total_limit:
+            if total_limit is not None and retrieved >= total_limit:
                 break
 
             # Calculate remaining number to retrieve
             current_limit = per_page_limit
             if total_limit is not None:
-                current_limit = min(per_page_limit, total_limit - len(all_products))
+                current_limit = min(per_page_limit, total_limit - retrieved)
                 if current_limit <= 0:
                     break
 
             # Retrieve product list
-            if next_page_url:
-                # Extract page_info from next_page_url
-                page_info = extract_page_info(next_page_url)
-                products = shopify.Product.find(
-                    limit=current_limit, page_info=page_info
-                )
-            else:
-                products = shopify.Product.find(limit=current_limit)
+            products, page_info, _ = await get_shopify_products_page(
+                current_limit, page_info, fields=fields, filters=filters
+            )
+            pages += 1
 
             # End if results are empty
             if not products:
                 break
 
-            # Add retrieved products
-            all_products.extend(products)
-
-            # Get pagination information from response headers
-            response_headers = shopify.ShopifyResource.connection.response.headers
-            link_header = response_headers.get("Link", "")
+            retrieved += len(products)
+            yield products
 
-            # Extract next page URL
-            next_page_url = extract_next_page_url(link_header)
-            if not next_page_url:
+            # End if there is no next page
+            if not page_info:
                 break
+    finally:
+        LISTING_PAGES.observe(pages)
 
-            # Wait a bit to avoid rate limits
-            time.sleep(0.5)
 
-    except Exception as e:
-        print(f"An error occurred: {e}")
+async def plan_listing_partitions(per_page_limit=250, filters=None):
+    """
+    Split a full-catalog read into created_at partitions
+
+    Parameters:
+    per_page_limit (int): Number of products per request (maximum 250)
+    filters (dict): Additional query filters such as updated_at_min
+
+    Returns:
+    list: Query filters of each partition (None to page serially)
+    """
+    if LISTING_PARTITIONS == 1:
+        return None
+    try:
+        with span("products.partition"):
+            return await plan_partitions(
+                get_shopify_client(),
+                LISTING_PARTITIONS or None,
+                min(per_page_limit, 250),
+                filters,
+            )
+    except ShopifyAPIError as e:
+        # Partitioning is only an optimization; page serially instead.
+        # stdout carries the stdio transport, so report it on stderr
+        print(f"Could not partition the catalog: {e}", file=sys.stderr)
+        return None
+
+
+async def iter_catalog_pages(filters=None, per_page_limit=250, fields=None):
+    """
+    Iterate over every product page, fetching partitions concurrently
+
+    Pages are yielded as they arrive, so products are not in ID order when
+    the catalog is partitioned.
+
+    Parameters:
+    filters (dict): Additional query filters such as updated_at_min
+    per_page_limit (int): Number of products per request (maximum 250)
+    fields (list): Product fields to retrieve (None for all fields)
+
+    Yields:
+    list: Products of each page
+    """
+    partitions = await plan_listing_partitions(per_page_limit, filters)
+    if not partitions:
+        async for products in iter_shopify_product_pages(
+            None, per_page_limit, fields=fields, filters=filters
+        ):
+            yield products
+        return
+
+    async for _, products in iter_partition_pages(
+        lambda partition: iter_shopify_product_pages(
+            None, per_page_limit, fields=fields, filters=partition
+        ),
+        partitions,
+    ):
+        yield products
+
+
+async def get_shopify_products_page(limit=50, page_info=None, fields=None, filters=None):
+    """
+    Function to retrieve a single page of products
 
-    # If total_limit is specified, return only that number
-    if total_limit is not None:
-        return all_products[:total_limit]
+    Parameters:
+    limit (int): Number of products to retrieve (maximum 250)
+    page_info (str): Cursor of the page to retrieve (None for the first page)
+    fields (list): Product fields to retrieve (None for all fields)
+    filters (dict): Additional query filters, only sent with the first page
 
-    return all_products
+    Returns:
+    tuple: (list of products, next page cursor, previous page cursor)
+    """
+    params = {"limit": min(limit, 250)}
+    if page_info:
+        # The cursor already encodes the filters of the first request
+        params["page_info"] = page_info
+    elif filters:
+        params.update(filters)
+    if fields:
+        params["fields"] = ",".join(fields)
+    with span("products.page", limit=params["limit"], cursor=bool(page_info)) as current:
+        response = await get_shopify_client().get("products.json", params=params)
+        products = response.data.get("products", [])
+        if current is not None:
+            current.set_attribute("products", len(products))
+
+        # Complete products keep the search index up to date
+        if not fields:
+            with span("index.add", products=len(products)):
+                index = get_shop().index
+                for product in products:
+                    index.add(product)
+
+    # Get pagination information from response headers
+    link_header = response.headers.get("Link", "")
+    next_page_url = extract_next_page_url(link_header)
+    previous_page_url = extract_previous_page_url(link_header)
+
+    return (
+        products,
+        extract_page_info(next_page_url) if next_page_url else None,
+        extract_page_info(previous_page_url) if previous_page_url else None,
+    )
 
 
 def extract_next_page_url(link_header):
@@ -109,6 +389,33 @@ def extract_next_page_url(link_header):
     Returns:
     str: URL of the next page (None if it doesn't exist)
     """
+    return extract_page_url(link_header, "next")
+
+
+def extract_previous_page_url(link_header):
+    """
+    Extract the URL of the previous page from the Link header
+
+    Parameters:
+    link_header (str): Link header from the response
+
+    Returns:
+    str: URL of the previous page (None if it doesn't exist)
+    """
+    return extract_page_url(link_header, "previous")
+
+
+def extract_page_url(link_header, rel_name):
+    """
+    Extract the URL with the given rel from the Link header
+
+    Parameters:
+    link_header (str): Link header from the response
+    rel_name (str): Relation name ("next" or "previous")
+
+    Returns:
+    str: URL of the page (None if it doesn't exist)
+    """
     if not link_header:
         return None
 
@@ -121,7 +428,7 @@ def extract_next_page_url(link_header):
         url = parts[0].strip().strip("<>")
         rel = parts[1].strip()
 
-        if 'rel="next"' in rel:
+        if f'rel="{rel_name}"' in rel:
             return url
 
     return None
@@ -148,13 +455,228 @@ def extract_page_info(next_page_url):
     return None
 
 
+# Input schemas shared by the single and bulk write tools
+CREATE_PRODUCT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "title": {"type": "string", "description": "Product name"},
+        "body_html": {
+            "type": "string",
+            "description": "Product description (HTML format)",
+        },
+        "vendor": {"type": "string", "description": "Vendor name"},
+        "product_type": {"type": "string", "description": "Product type"},
+        "tags": {"type": "string", "description": "Tags (comma-separated)"},
+        "status": {
+            "type": "string",
+            "description": "Status",
+            "enum": ["active", "draft", "archived"],
+            "default": "active",
+        },
+        "variants": {
+            "type": "array",
+            "description": "Variants",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "price": {"type": "string", "description": "Price"},
+                    "sku": {"type": "string", "description": "SKU"},
+                    "inventory_quantity": {
+                        "type": "number",
+                        "description": "Inventory quantity",
+                    },
+                    "option1": {
+                        "type": "string",
+                        "description": "Option 1 value",
+                    },
+                    "option2": {
+                        "type": "string",
+                        "description": "Option 2 value",
+                    },
+                    "option3": {
+                        "type": "string",
+                        "description": "Option 3 value",
+                    },
+                },
+                "required": ["price"],
+            },
+        },
+        "options": {
+            "type": "array",
+            "description": "Options",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "name": {
+                        "type": "string",
+                        "description": "Option name",
+                    },
+                    "position": {
+                        "position": "number",
+                        "description": "Option order",
+                    },
+                    "values": {
+                        "type": "array",
+                        "description": "Option values",
+                        "items": {"type": "string"},
+                    },
+                },
+                "required": ["name", "position", "values"],
+            },
+        },
+        "images": {
+            "type": "array",
+            "description": "Images",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "src": {"type": "string", "description": "Image URL"},
+                    "alt": {
+                        "type": "string",
+                        "description": "Alternative text",
+                    },
+                },
+                "required": ["src"],
+            },
+        },
+    },
+    "required": ["title"],
+}
+
+UPDATE_PRODUCT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "product_id": {"type": "number", "description": "Product ID"},
+        "title": {"type": "string", "description": "Product name"},
+        "body_html": {
+            "type": "string",
+            "description": "Product description (HTML format)",
+        },
+        "vendor": {"type": "string", "description": "Vendor name"},
+        "product_type": {"type": "string", "description": "Product type"},
+        "tags": {"type": "string", "description": "Tags (comma-separated)"},
+        "status": {
+            "type": "string",
+            "description": "Status",
+            "enum": ["active", "draft", "archived"],
+        },
+        "variants": {
+            "type": "array",
+            "description": "Variants",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "id": {
+                        "type": "number",
+                        "description": "Variant ID",
+                    },
+                    "price": {"type": "string", "description": "Price"},
+                    "sku": {"type": "string", "description": "SKU"},
+                    "inventory_quantity": {
+                        "type": "number",
+                        "description": "Inventory quantity",
+                    },
+                    "option1": {
+                        "type": "string",
+                        "description": "Option 1 value",
+                    },
+                    "option2": {
+                        "type": "string",
+                        "description": "Option 2 value",
+                    },
+                    "option3": {
+                        "type": "string",
+                        "description": "Option 3 value",
+                    },
+                },
+            },
+        },
+        "options": {
+            "type": "array",
+            "description": "Options",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "id": {"type": "number", "description": "Option ID"},
+                    "name": {
+                        "type": "string",
+                        "description": "Option name",
+                    },
+                    "position": {
+                        "position": "number",
+                        "description": "Option order",
+                    },
+                    "values": {
+                        "type": "array",
+                        "description": "Option values",
+                        "items": {"type": "string"},
+                    },
+                },
+                "required": ["name", "values"],
+            },
+        },
+        "images": {
+            "type": "array",
+            "description": "Images",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "id": {"type": "number", "description": "Image ID"},
+                    "src": {"type": "string", "description": "Image URL"},
+                    "alt": {
+                        "type": "string",
+                        "description": "Alternative text",
+                    },
+                },
+                "required": ["src"],
+            },
+        },
+    },
+    "required": ["product_id"],
+}
+
+RESPONSE_FORMAT_SCHEMA = {
+    "type": "string",
+    "description": "Response format: pretty (indented JSON), compact (JSON without whitespace) or table (compact, with lists of objects as columns and rows)",
+    "enum": list(RESPONSE_FORMATS),
+}
+
+
+# Tool list built by get_tool_list, with the shop names it was built for
+_tool_list = None
+_tool_list_shops = None
+
+
+def get_tool_list():
+    """
+    Return the tool list, building it on first use
+
+    The list only changes with the configured shops, so it is built once
+    and shared by every list_tools request. Callers must not modify it.
+
+    Returns:
+    list: Tools
+    """
+    global _tool_list, _tool_list_shops
+    shops = (shop_registry.default_name, tuple(shop_registry.names()))
+    if _tool_list is None or _tool_list_shops != shops:
+        _tool_list = build_tool_list()
+        _tool_list_shops = shops
+    return _tool_list
+
+
 @server.list_tools()
 async def handle_list_tools() -> list[types.Tool]:
     """
     Returns a list of available tools.
     Each tool specifies its arguments using JSON Schema.
     """
-    return [
+    return list(get_tool_list())
+
+
+def build_tool_list() -> list[types.Tool]:
+    """Build the list of available tools"""
+    tools = [
         types.Tool(
             name="list_products",
             description="Get product list",
@@ -168,6 +690,19 @@ async def handle_list_tools() -> list[types.Tool]:
                         "maximum": 250,
                         "default": 50,
                     },
+                    "cursor": {
+                        "type": "string",
+                        "description": "Page cursor (next_cursor or previous_cursor from a previous call)",
+                    },
+                    "fields": {
+                        "type": "array",
+                        "description": "Product fields to retrieve (variants and images are returned as counts)",
+                        "items": {"type": "string"},
+                    },
+                    "max_age": {
+                        "type": "number",
+                        "description": "Maximum age in seconds of catalog mirror data (when the mirror is enabled)",
+                    },
                 },
             },
         ),
@@ -177,7 +712,21 @@ async def handle_list_tools() -> list[types.Tool]:
             inputSchema={
                 "type": "object",
                 "properties": {
-                    "product_id": {"type": "number", "description": "Product ID"}
+                    "product_id": {"type": "number", "description": "Product ID"},
+                    "fresh": {
+                        "type": "boolean",
+                        "description": "Bypass the local cache and read from Shopify",
+                        "default": False,
+                    },
+                    "fields": {
+                        "type": "array",
+                        "description": "Product fields to retrieve (all fields by default)",
+                        "items": {"type": "string"},
+                    },
+                    "max_age": {
+                        "type": "number",
+                        "description": "Maximum age in seconds of catalog mirror data (when the mirror is enabled)",
+                    },
                 },
                 "required": ["product_id"],
             },
@@ -185,201 +734,239 @@ async def handle_list_tools() -> list[types.Tool]:
         types.Tool(
             name="create_product",
             description="Create a new product",
+            inputSchema=CREATE_PRODUCT_SCHEMA,
+        ),
+        types.Tool(
+            name="update_product",
+            description="Update a product",
+            inputSchema=UPDATE_PRODUCT_SCHEMA,
+        ),
+        types.Tool(
+            name="bulk_create_products",
+            description="Create multiple products concurrently",
             inputSchema={
                 "type": "object",
                 "properties": {
-                    "title": {"type": "string", "description": "Product name"},
-                    "body_html": {
-                        "type": "string",
-                        "description": "Product description (HTML format)",
+                    "products": {
+                        "type": "array",
+                        "description": "Products to create",
+                        "items": CREATE_PRODUCT_SCHEMA,
                     },
-                    "vendor": {"type": "string", "description": "Vendor name"},
-                    "product_type": {"type": "string", "description": "Product type"},
-                    "tags": {"type": "string", "description": "Tags (comma-separated)"},
-                    "status": {
-                        "type": "string",
-                        "description": "Status",
-                        "enum": ["active", "draft", "archived"],
-                        "default": "active",
+                    "concurrency": {
+                        "type": "number",
+                        "description": "Number of products created at the same time",
+                        "minimum": 1,
+                        "default": BULK_CONCURRENCY,
+                    },
+                },
+                "required": ["products"],
+            },
+        ),
+        types.Tool(
+            name="bulk_update_products",
+            description="Update multiple products concurrently",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "products": {
+                        "type": "array",
+                        "description": "Product updates, each with its product_id",
+                        "items": UPDATE_PRODUCT_SCHEMA,
+                    },
+                    "concurrency": {
+                        "type": "number",
+                        "description": "Number of products updated at the same time",
+                        "minimum": 1,
+                        "default": BULK_CONCURRENCY,
+                    },
+                },
+                "required": ["products"],
+            },
+        ),
+        types.Tool(
+            name="delete_product",
+            description="Delete a product",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "product_id": {"type": "number", "description": "Product ID"}
+                },
+                "required": ["product_id"],
+            },
+        ),
+        types.Tool(
+            name="bulk_delete_products",
+            description="Delete multiple products concurrently",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "product_ids": {
+                        "type": "array",
+                        "description": "IDs of the products to delete",
+                        "items": {"type": "number"},
+                    },
+                    "concurrency": {
+                        "type": "number",
+                        "description": "Number of products deleted at the same time",
+                        "minimum": 1,
+                        "default": BULK_CONCURRENCY,
                     },
+                },
+                "required": ["product_ids"],
+            },
+        ),
+        types.Tool(
+            name="bulk_update_variants",
+            description="Update many variants of one product in a single call",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "product_id": {"type": "number", "description": "Product ID"},
                     "variants": {
                         "type": "array",
-                        "description": "Variants",
+                        "description": "Variant changes, each identified by id or sku",
                         "items": {
                             "type": "object",
                             "properties": {
-                                "price": {"type": "string", "description": "Price"},
-                                "sku": {"type": "string", "description": "SKU"},
-                                "inventory_quantity": {
+                                "id": {
                                     "type": "number",
-                                    "description": "Inventory quantity",
+                                    "description": "Variant ID",
                                 },
-                                "option1": {
+                                "sku": {
                                     "type": "string",
-                                    "description": "Option 1 value",
+                                    "description": "SKU (identifies the variant when id is omitted, otherwise the new SKU)",
                                 },
-                                "option2": {
+                                "price": {"type": "string", "description": "Price"},
+                                "compare_at_price": {
                                     "type": "string",
-                                    "description": "Option 2 value",
+                                    "description": "Compare-at price",
                                 },
-                                "option3": {
+                                "barcode": {
                                     "type": "string",
-                                    "description": "Option 3 value",
+                                    "description": "Barcode",
                                 },
                             },
-                            "required": ["price"],
                         },
                     },
-                    "options": {
-                        "type": "array",
-                        "description": "Options",
-                        "items": {
-                            "type": "object",
-                            "properties": {
-                                "name": {
-                                    "type": "string",
-                                    "description": "Option name",
-                                },
-                                "position": {
-                                    "position": "number",
-                                    "description": "Option order",
-                                },
-                                "values": {
-                                    "type": "array",
-                                    "description": "Option values",
-                                    "items": {"type": "string"},
-                                },
-                            },
-                            "required": ["name", "position", "values"],
-                        },
+                },
+                "required": ["product_id", "variants"],
+            },
+        ),
+        types.Tool(
+            name="export_catalog",
+            description="Export the whole product catalog with a Shopify bulk operation",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "output_path": {
+                        "type": "string",
+                        "description": "File in SHOPIFY_EXPORT_DIR the JSONL export is written to (summary only if omitted)",
                     },
-                    "images": {
-                        "type": "array",
-                        "description": "Images",
-                        "items": {
-                            "type": "object",
-                            "properties": {
-                                "src": {"type": "string", "description": "Image URL"},
-                                "alt": {
-                                    "type": "string",
-                                    "description": "Alternative text",
-                                },
-                            },
-                            "required": ["src"],
-                        },
+                    "timeout": {
+                        "type": "number",
+                        "description": "Maximum number of seconds to wait for the export",
+                        "default": DEFAULT_EXPORT_TIMEOUT,
                     },
                 },
-                "required": ["title"],
             },
         ),
         types.Tool(
-            name="update_product",
-            description="Update a product",
+            name="search_products",
+            description="Search products in the local index by text and facets",
             inputSchema={
                 "type": "object",
                 "properties": {
-                    "product_id": {"type": "number", "description": "Product ID"},
-                    "title": {"type": "string", "description": "Product name"},
-                    "body_html": {
+                    "query": {
                         "type": "string",
-                        "description": "Product description (HTML format)",
+                        "description": "Words to match in title, description, vendor, type, tags, status and SKU",
                     },
                     "vendor": {"type": "string", "description": "Vendor name"},
                     "product_type": {"type": "string", "description": "Product type"},
-                    "tags": {"type": "string", "description": "Tags (comma-separated)"},
                     "status": {
                         "type": "string",
                         "description": "Status",
                         "enum": ["active", "draft", "archived"],
                     },
-                    "variants": {
+                    "tags": {
                         "type": "array",
-                        "description": "Variants",
-                        "items": {
-                            "type": "object",
-                            "properties": {
-                                "id": {
-                                    "type": "number",
-                                    "description": "Variant ID",
-                                },
-                                "price": {"type": "string", "description": "Price"},
-                                "sku": {"type": "string", "description": "SKU"},
-                                "inventory_quantity": {
-                                    "type": "number",
-                                    "description": "Inventory quantity",
-                                },
-                                "option1": {
-                                    "type": "string",
-                                    "description": "Option 1 value",
-                                },
-                                "option2": {
-                                    "type": "string",
-                                    "description": "Option 2 value",
-                                },
-                                "option3": {
-                                    "type": "string",
-                                    "description": "Option 3 value",
-                                },
-                            },
-                        },
+                        "description": "Tags that must all be present",
+                        "items": {"type": "string"},
                     },
-                    "options": {
-                        "type": "array",
-                        "description": "Options",
-                        "items": {
-                            "type": "object",
-                            "properties": {
-                                "id": {"type": "number", "description": "Option ID"},
-                                "name": {
-                                    "type": "string",
-                                    "description": "Option name",
-                                },
-                                "position": {
-                                    "position": "number",
-                                    "description": "Option order",
-                                },
-                                "values": {
-                                    "type": "array",
-                                    "description": "Option values",
-                                    "items": {"type": "string"},
-                                },
-                            },
-                            "required": ["name", "values"],
-                        },
+                    "limit": {
+                        "type": "number",
+                        "description": "Number of products to return",
+                        "minimum": 1,
+                        "maximum": 250,
+                        "default": 50,
                     },
-                    "images": {
-                        "type": "array",
-                        "description": "Images",
-                        "items": {
-                            "type": "object",
-                            "properties": {
-                                "id": {"type": "number", "description": "Image ID"},
-                                "src": {"type": "string", "description": "Image URL"},
-                                "alt": {
-                                    "type": "string",
-                                    "description": "Alternative text",
-                                },
-                            },
-                            "required": ["src"],
-                        },
+                    "offset": {
+                        "type": "number",
+                        "description": "Number of matching products to skip",
+                        "default": 0,
+                    },
+                    "max_age": {
+                        "type": "number",
+                        "description": "Maximum age in seconds of catalog mirror data (when the mirror is enabled)",
                     },
                 },
-                "required": ["product_id"],
             },
         ),
         types.Tool(
-            name="delete_product",
-            description="Delete a product",
+            name="sync_catalog",
+            description="Sync the local catalog mirror with Shopify",
             inputSchema={
                 "type": "object",
                 "properties": {
-                    "product_id": {"type": "number", "description": "Product ID"}
+                    "full": {
+                        "type": "boolean",
+                        "description": "Download the whole catalog instead of only changes since the last sync",
+                        "default": False,
+                    },
                 },
-                "required": ["product_id"],
             },
         ),
+        types.Tool(
+            name="get_cache_stats",
+            description="Get product cache and request coalescing statistics",
+            inputSchema={"type": "object", "properties": {}},
+        ),
     ]
 
+    # Every tool accepts a per-call response format and shop
+    for tool in tools:
+        tool.inputSchema = {
+            **tool.inputSchema,
+            "properties": {
+                **tool.inputSchema.get("properties", {}),
+                "response_format": RESPONSE_FORMAT_SCHEMA,
+                "shop": {
+                    "type": "string",
+                    "description": f"Shop to work on (default is {shop_registry.default_name})",
+                    "enum": shop_registry.names(),
+                },
+            },
+        }
+    return tools
+
+
+# Priority class of the upstream requests of each tool: single-resource
+# reads an agent is waiting on, writes, and bulk or paging work
+TOOL_PRIORITIES = {
+    "list_products": INTERACTIVE,
+    "get_product": INTERACTIVE,
+    "search_products": INTERACTIVE,
+    "get_cache_stats": INTERACTIVE,
+    "create_product": WRITE,
+    "update_product": WRITE,
+    "delete_product": WRITE,
+    "bulk_update_variants": WRITE,
+    "bulk_create_products": BACKGROUND,
+    "bulk_update_products": BACKGROUND,
+    "bulk_delete_products": BACKGROUND,
+    "export_catalog": BACKGROUND,
+    "sync_catalog": BACKGROUND,
+}
+
 
 @server.call_tool()
 async def handle_call_tool(
@@ -388,59 +975,505 @@ async def handle_call_tool(
     """
     Processes tool execution requests.
     """
+    started = time.perf_counter()
+    status = "ok"
     try:
-        initialize_shopify_api()
-
-        if name == "list_products":
-            return await handle_list_products(arguments or {})
-        elif name == "get_product":
-            return await handle_get_product(arguments or {})
-        elif name == "create_product":
-            return await handle_create_product(arguments or {})
-        elif name == "update_product":
-            return await handle_update_product(arguments or {})
-        elif name == "delete_product":
-            return await handle_delete_product(arguments or {})
-        else:
-            raise ValueError(f"Unknown tool: {name}")
+        # Check the response format before the tool runs, so that a write
+        # is not reported as failed after it has been made
+        response_format = (arguments or {}).get("response_format")
+        if response_format:
+            check_format(response_format, JSON_ENCODER)
+
+        # Every tool runs against the shop named by its shop argument, and
+        # its upstream requests are scheduled by the tool's priority class
+        with use_shop((arguments or {}).get("shop")), request_priority(
+            TOOL_PRIORITIES.get(name, INTERACTIVE)
+        ), span(f"tool {name}", kind="server", tool=name, shop=get_shop().name):
+            if name == "list_products":
+                return await handle_list_products(arguments or {})
+            elif name == "get_product":
+                return await handle_get_product(arguments or {})
+            elif name == "create_product":
+                return await handle_create_product(arguments or {})
+            elif name == "update_product":
+                return await handle_update_product(arguments or {})
+            elif name == "delete_product":
+                return await handle_delete_product(arguments or {})
+            elif name == "bulk_delete_products":
+                return await handle_bulk_delete_products(arguments or {})
+            elif name == "bulk_create_products":
+                return await handle_bulk_create_products(arguments or {})
+            elif name == "bulk_update_products":
+                return await handle_bulk_update_products(arguments or {})
+            elif name == "bulk_update_variants":
+                return await handle_bulk_update_variants(arguments or {})
+            elif name == "export_catalog":
+                return await handle_export_catalog(arguments or {})
+            elif name == "search_products":
+                return await handle_search_products(arguments or {})
+            elif name == "sync_catalog":
+                return await handle_sync_catalog(arguments or {})
+            elif name == "get_cache_stats":
+                return await handle_get_cache_stats(arguments or {})
+            else:
+                raise ValueError(f"Unknown tool: {name}")
     except Exception as e:
+        status = "error"
         return [
             types.TextContent(
                 type="text",
                 text=f"An error occurred: {str(e)}",
             )
         ]
+    finally:
+        TOOL_DURATION.observe(time.perf_counter() - started, tool=tool_label(name), status=status)
+
+
+def tool_label(name):
+    """
+    Return the metric label of a tool name
+
+    Tool names come from the client, so names that are not in the tool
+    list are recorded as "unknown" to keep the number of series bounded.
+    """
+    if any(tool.name == name for tool in get_tool_list()):
+        return name
+    return "unknown"
+
+
+def format_label(response_format):
+    """
+    Return the metric label of a response format
+
+    Response formats come from the client, so formats that are not known are
+    recorded as "invalid" to keep the number of series bounded.
+    """
+    if response_format in RESPONSE_FORMATS:
+        return response_format
+    return "invalid"
+
+
+def json_response(data, arguments=None) -> list[types.TextContent]:
+    """
+    Serialize a tool result in the requested response format
+
+    Parameters:
+    data: Tool result
+    arguments (dict): Tool arguments; response_format overrides SHOPIFY_RESPONSE_FORMAT
+
+    Returns:
+    list: Text content holding the serialized result
+    """
+    response_format = (arguments or {}).get("response_format") or RESPONSE_FORMAT
+    label = format_label(response_format)
+    with span("serialize", format=label), SERIALIZATION_DURATION.time(format=label):
+        text = dumps(data, response_format, JSON_ENCODER)
+    RESPONSE_BYTES.inc(len(text.encode("utf-8")), format=label)
+    return [types.TextContent(type="text", text=text)]
+
+
+def is_newer(product, current):
+    """Return False if current has a later updated_at than product"""
+    try:
+        return datetime.fromisoformat(product["updated_at"]) >= datetime.fromisoformat(
+            current["updated_at"]
+        )
+    except (KeyError, TypeError, ValueError):
+        return True
+
+
+def remember_product(product):
+    """Store a complete product in the cache, the catalog mirror and the search index"""
+    shop = get_shop()
+    shop.cache.set(product)
+    shop.index.add(product)
+    if shop.mirror is not None:
+        shop.mirror.upsert_products([product])
+
+
+def forget_product(product_id):
+    """Remove a product from the cache, the catalog mirror and the search index"""
+    shop = get_shop()
+    shop.cache.invalidate(product_id)
+    shop.index.remove(product_id)
+    if shop.mirror is not None:
+        shop.mirror.delete_product(product_id)
+
+
+def get_local_product(product_id):
+    """Return the locally held copy of a product without calling Shopify"""
+    shop = get_shop()
+    product = shop.cache.peek(product_id)
+    if product is None and shop.mirror is not None:
+        product = shop.mirror.get_product(product_id)
+    return product
+
+
+def handle_product_webhook(topic, payload):
+    """
+    Apply a product webhook to local state
+
+    Parameters:
+    topic (str): Webhook topic (products/create, products/update or products/delete)
+    payload (dict): Webhook body
+
+    Returns:
+    bool: True if the topic was handled
+    """
+    if topic not in ("products/create", "products/update", "products/delete"):
+        return False
+    if not isinstance(payload, dict) or "id" not in payload:
+        raise ValueError("Product webhook payload without a product id")
+
+    if topic == "products/delete":
+        forget_product(payload["id"])
+        return True
+
+    # Ignore deliveries that are older than what we already hold
+    current = get_local_product(payload["id"])
+    if current is None or is_newer(payload, current):
+        remember_product(payload)
+    return True
+
+
+# Fields requested from Shopify by list_products unless the caller asks for others
+LIST_PRODUCT_FIELDS = [
+    "id",
+    "title",
+    "vendor",
+    "product_type",
+    "created_at",
+    "updated_at",
+    "status",
+]
+
+# Fields returned by get_product unless the caller asks for others
+PRODUCT_DETAIL_FIELDS = [
+    "id",
+    "title",
+    "body_html",
+    "vendor",
+    "product_type",
+    "created_at",
+    "updated_at",
+    "status",
+    "tags",
+    "variants",
+    "options",
+    "images",
+]
+
+
+def normalize_fields(fields, default):
+    """
+    Normalize a fields argument into a list of field names
+
+    Parameters:
+    fields (list | str): Field names as a list or comma-separated string
+    default (list): Fields to use when none are given
+
+    Returns:
+    list: Field names, always including id
+    """
+    if not fields:
+        return list(default)
+    if isinstance(fields, str):
+        fields = fields.split(",")
+    fields = [field.strip() for field in fields if field and field.strip()]
+    if "id" not in fields:
+        fields.insert(0, "id")
+    return fields
+
+
+def format_product_summary(product, fields=LIST_PRODUCT_FIELDS):
+    """Format the product fields returned by list_products"""
+    result = {}
+    for field in fields:
+        # Nested collections are summarized as counts
+        if field in ("variants", "images"):
+            result[f"{field}_count"] = len(product.get(field) or [])
+        else:
+            result[field] = product.get(field)
+    return result
+
+
+def format_product_detail(product, fields=PRODUCT_DETAIL_FIELDS):
+    """Format the product fields returned by get_product"""
+    result = {}
+    for field in fields:
+        if field == "variants":
+            # Variant information
+            result["variants"] = [
+                {
+                    "id": variant.get("id"),
+                    "title": variant.get("title"),
+                    "price": variant.get("price"),
+                    "sku": variant.get("sku"),
+                    "inventory_quantity": variant.get("inventory_quantity"),
+                    "option1": variant.get("option1"),
+                    "option2": variant.get("option2"),
+                    "option3": variant.get("option3"),
+                }
+                for variant in product.get("variants") or []
+            ]
+        elif field == "options":
+            # Option information
+            result["options"] = [
+                {
+                    "id": option.get("id"),
+                    "name": option.get("name"),
+                    "values": option.get("values"),
+                }
+                for option in product.get("options") or []
+            ]
+        elif field == "images":
+            # Image information
+            result["images"] = [
+                {"id": image.get("id"), "src": image.get("src"), "alt": image.get("alt")}
+                for image in product.get("images") or []
+            ]
+        else:
+            result[field] = product.get(field)
+    return result
+
+
+# Prefix of list_products cursors that page through the catalog mirror
+MIRROR_CURSOR_PREFIX = "mirror:"
+
+
+async def sync_catalog_mirror(full=False, max_age=None):
+    """
+    Sync the catalog mirror with Shopify
+
+    Parameters:
+    full (bool): Download the whole catalog instead of only recent changes
+    max_age (float): Skip the sync if the mirror was synced within this many seconds
+
+    Returns:
+    dict: Summary of the sync (None if it was skipped)
+    """
+    shop = get_shop()
+    if shop.mirror is None:
+        raise ValueError("The catalog mirror is disabled (set SHOPIFY_MIRROR_PATH)")
+
+    async with shop.mirror_lock:
+        # Another caller may have synced while we were waiting for the lock
+        age = shop.mirror.age()
+        if max_age is not None and age is not None and age <= max_age:
+            return None
+        # Syncs triggered by stale reads would otherwise inherit the
+        # interactive priority of the read
+        with request_priority(BACKGROUND):
+            summary = await sync_mirror(
+                shop.mirror,
+                lambda filters: iter_catalog_pages(filters),
+                full=full,
+                count_products=count_shopify_products,
+                iter_id_pages=lambda: iter_catalog_pages(fields=["id"]),
+            )
+
+        # Synced pages are indexed as they are fetched; a sync that removed
+        # products needs the index rebuilt to drop them as well
+        if summary["products_removed"] or (
+            summary["mode"] == "full" and not shop.index.complete
+        ):
+            build_search_index(shop.mirror)
+        return summary
+
+
+async def count_shopify_products():
+    """Return the number of products in the current shop"""
+    response = await get_shopify_client().get("products/count.json")
+    return int(response.data.get("count", 0))
+
+
+def build_search_index(mirror):
+    """Rebuild the current shop's search index from the catalog mirror"""
+    index = get_shop().index
+    index.clear()
+    for product in mirror.iter_products():
+        index.add(product)
+    index.complete = True
+
+
+async def get_fresh_mirror(max_age=None):
+    """
+    Return the catalog mirror once it is within the freshness bound
+
+    A stale mirror is brought up to date with an incremental sync first.
+
+    Parameters:
+    max_age (float): Maximum age of the mirror in seconds (SHOPIFY_MIRROR_MAX_AGE by default)
+
+    Returns:
+    CatalogMirror: The mirror (None if it is disabled or has never been fully synced)
+    """
+    mirror = get_shop().mirror
+    if mirror is None or not mirror.is_synced:
+        return None
+
+    max_age = MIRROR_MAX_AGE if max_age is None else float(max_age)
+    age = mirror.age()
+    if age is None or age > max_age:
+        await sync_catalog_mirror(max_age=max_age)
+    return mirror
+
+
+def list_mirror_products(mirror, limit, cursor=None):
+    """
+    Function to retrieve a single page of products from the catalog mirror
+
+    Parameters:
+    mirror (CatalogMirror): Catalog mirror
+    limit (int): Number of products to retrieve
+    cursor (str): Mirror cursor of the page to retrieve (None for the first page)
+
+    Returns:
+    tuple: (list of products, next page cursor, previous page cursor)
+    """
+    after_id = int(cursor[len(MIRROR_CURSOR_PREFIX):]) if cursor else None
+
+    # Fetch one extra product to find out whether there is a next page
+    products = mirror.list_products(limit + 1, after_id)
+    next_cursor = None
+    if len(products) > limit:
+        products = products[:limit]
+        next_cursor = f"{MIRROR_CURSOR_PREFIX}{products[-1]['id']}"
+    return products, next_cursor, None
+
+
+async def iter_product_summaries(arguments: dict):
+    """
+    Iterate over the product list page by page, for streaming responses
+
+    Only a few pages are held in memory at a time, so memory use is bounded
+    by the page size rather than the size of the catalog. Pages of a
+    partitioned catalog are yielded as they arrive rather than in ID order.
+
+    Parameters:
+    arguments (dict): limit (None for all products), page_size, fields and max_age
+
+    Yields:
+    list: Product summaries of each page
+    """
+    limit = arguments.get("limit")
+    total_limit = int(limit) if limit is not None else None
+    page_size = min(int(arguments.get("page_size", 250)), 250)
+    fields = normalize_fields(arguments.get("fields"), LIST_PRODUCT_FIELDS)
+
+    mirror = await get_fresh_mirror(arguments.get("max_age"))
+    if mirror is None:
+        # Without a limit the whole catalog is streamed, which can be split
+        # into partitions fetched concurrently
+        if total_limit is None:
+            pages = iter_catalog_pages(per_page_limit=page_size, fields=fields)
+        else:
+            pages = iter_shopify_product_pages(total_limit, page_size, fields=fields)
+        async for products in pages:
+            yield [format_product_summary(product, fields) for product in products]
+        return
+
+    # Page through the catalog mirror by ID
+    retrieved = 0
+    after_id = None
+    while total_limit is None or retrieved < total_limit:
+        current_limit = page_size
+        if total_limit is not None:
+            current_limit = min(page_size, total_limit - retrieved)
+        products = mirror.list_products(current_limit, after_id)
+        if not products:
+            break
+        retrieved += len(products)
+        yield [format_product_summary(product, fields) for product in products]
+        if len(products) < current_limit:
+            break
+        after_id = products[-1]["id"]
 
 
 async def handle_list_products(arguments: dict) -> list[types.TextContent]:
     """Get product list"""
-    limit = int(arguments.get("limit", 50))
-    products = get_all_shopify_products(
-        total_limit=limit, per_page_limit=250  # Retrieve up to 250 products per request
+    limit = min(int(arguments.get("limit", 50)), 250)
+    cursor = arguments.get("cursor")
+    fields = normalize_fields(arguments.get("fields"), LIST_PRODUCT_FIELDS)
+
+    # Answer from the catalog mirror when it is fresh enough
+    mirror = None
+    is_mirror_cursor = bool(cursor) and cursor.startswith(MIRROR_CURSOR_PREFIX)
+    if not cursor or is_mirror_cursor:
+        mirror = await get_fresh_mirror(arguments.get("max_age"))
+        if mirror is None and is_mirror_cursor:
+            raise ValueError("The catalog mirror is not available for this cursor")
+
+    if mirror is not None:
+        products, next_cursor, previous_cursor = list_mirror_products(
+            mirror, limit, cursor
+        )
+    else:
+        # Retrieve exactly one page starting at the cursor
+        products, next_cursor, previous_cursor = await get_shopify_products_page(
+            limit, cursor, fields=fields
+        )
+
+    result = {
+        "products": [format_product_summary(product, fields) for product in products],
+        "next_cursor": next_cursor,
+        "previous_cursor": previous_cursor,
+    }
+
+    return json_response(result, arguments)
+
+
+async def fetch_product(product_id, fields=None):
+    """
+    Retrieve a single product from the Shopify Admin API
+
+    Parameters:
+    product_id (int): Product ID
+    fields (list): Fields to retrieve (None for all fields)
+
+    Returns:
+    dict: Product resource
+    """
+    params = {"fields": ",".join(fields)} if fields else None
+    response = await get_shopify_client().get(
+        f"products/{int(product_id)}.json", params=params
     )
+    return response.data["product"]
 
-    result = []
-    for product in products:
-        result.append(
-            {
-                "id": product.id,
-                "title": product.title,
-                "vendor": product.vendor,
-                "product_type": product.product_type,
-                "created_at": product.created_at,
-                "updated_at": product.updated_at,
-                "status": product.status,
-                "variants_count": len(product.variants),
-                "images_count": len(product.images),
-            }
-        )
 
-    return [
-        types.TextContent(
-            type="text",
-            text=json.dumps(result, indent=2, ensure_ascii=False),
-        )
-    ]
+async def get_cached_product(product_id, fresh=False, fields=None, max_age=None):
+    """
+    Retrieve a single product, serving it from the product cache when possible
+
+    Parameters:
+    product_id (int): Product ID
+    fresh (bool): Skip the cache and read from the Shopify Admin API
+    fields (list): Fields needed by the caller (None for all fields)
+    max_age (float): Maximum age in seconds of catalog mirror data
+
+    Returns:
+    dict: Product resource
+    """
+    if not fresh:
+        cache = get_shop().cache
+        product = cache.get(product_id)
+        if product is not None:
+            return product
+
+        mirror = await get_fresh_mirror(max_age)
+        if mirror is not None:
+            product = mirror.get_product(product_id)
+            if product is not None:
+                cache.set(product)
+                return product
+
+    # Only complete products are cached
+    if fields:
+        return await fetch_product(product_id, fields)
+
+    product = await fetch_product(product_id)
+    remember_product(product)
+    return product
 
 
 async def handle_get_product(arguments: dict) -> list[types.TextContent]:
@@ -449,255 +1482,418 @@ async def handle_get_product(arguments: dict) -> list[types.TextContent]:
     if not product_id:
         raise ValueError("product_id is required")
 
-    product = shopify.Product.find(product_id)
+    fields = None
+    if arguments.get("fields"):
+        fields = normalize_fields(arguments["fields"], PRODUCT_DETAIL_FIELDS)
+
+    product = await get_cached_product(
+        product_id,
+        bool(arguments.get("fresh")),
+        fields=fields,
+        max_age=arguments.get("max_age"),
+    )
 
     # Format product information
-    result = {
-        "id": product.id,
-        "title": product.title,
-        "body_html": product.body_html,
-        "vendor": product.vendor,
-        "product_type": product.product_type,
-        "created_at": product.created_at,
-        "updated_at": product.updated_at,
-        "status": product.status,
-        "tags": product.tags,
-        "variants": [],
-        "options": [],
-        "images": [],
-    }
+    result = format_product_detail(product, fields or PRODUCT_DETAIL_FIELDS)
 
-    # Variant information
-    for variant in product.variants:
-        result["variants"].append(
-            {
-                "id": variant.id,
-                "title": variant.title,
-                "price": variant.price,
-                "sku": variant.sku,
-                "inventory_quantity": variant.inventory_quantity,
-                "option1": variant.option1,
-                "option2": variant.option2,
-                "option3": variant.option3,
-            }
-        )
+    return json_response(result, arguments)
 
-    # Option information
-    for option in product.options:
-        result["options"].append(
-            {"id": option.id, "name": option.name, "values": option.values}
-        )
 
-    # Image information
-    for image in product.images:
-        result["images"].append({"id": image.id, "src": image.src, "alt": image.alt})
+# Fields that can be set directly from tool arguments
+PRODUCT_FIELDS = ("title", "body_html", "vendor", "product_type", "tags", "status")
+VARIANT_FIELDS = ("price", "sku", "inventory_quantity", "option1", "option2", "option3")
 
-    return [
-        types.TextContent(
-            type="text",
-            text=json.dumps(result, indent=2, ensure_ascii=False),
-        )
-    ]
 
+def copy_fields(source, target, fields):
+    """Copy the given fields that are present in source into target"""
+    for field in fields:
+        if field in source:
+            target[field] = source[field]
+    return target
 
-async def handle_create_product(arguments: dict) -> list[types.TextContent]:
-    """Create a new product"""
+
+async def create_product(arguments: dict) -> dict:
+    """
+    Create a new product from tool arguments
+
+    Parameters:
+    arguments (dict): Product attributes as accepted by create_product
+
+    Returns:
+    dict: Saved product resource
+    """
     # Check required parameters
     title = arguments.get("title")
     if not title:
         raise ValueError("title is required")
 
-    # Create product object
-    product = shopify.Product()
-    product.title = title
-
-    # Set optional parameters
-    if "body_html" in arguments:
-        product.body_html = arguments["body_html"]
-    if "vendor" in arguments:
-        product.vendor = arguments["vendor"]
-    if "product_type" in arguments:
-        product.product_type = arguments["product_type"]
-    if "tags" in arguments:
-        product.tags = arguments["tags"]
-    if "status" in arguments:
-        product.status = arguments["status"]
+    # Create product payload
+    product = copy_fields(arguments, {}, PRODUCT_FIELDS)
 
     # Set options
     if "options" in arguments and arguments["options"]:
-        options = []
-        for option_data in arguments["options"]:
-            option = shopify.Option()
-            option.name = option_data["name"]
-            option.position = option_data["position"]
-            option.values = option_data["values"]
-            options.append(option)
-        product.options = options
+        product["options"] = [
+            {
+                "name": option_data["name"],
+                "position": option_data["position"],
+                "values": option_data["values"],
+            }
+            for option_data in arguments["options"]
+        ]
 
     # Set variants
     if "variants" in arguments and arguments["variants"]:
-        variants = []
-        for variant_data in arguments["variants"]:
-            variant = shopify.Variant()
-            if "price" in variant_data:
-                variant.price = variant_data["price"]
-            if "sku" in variant_data:
-                variant.sku = variant_data["sku"]
-            if "inventory_quantity" in variant_data:
-                variant.inventory_quantity = variant_data["inventory_quantity"]
-            if "option1" in variant_data:
-                variant.option1 = variant_data["option1"]
-            if "option2" in variant_data:
-                variant.option2 = variant_data["option2"]
-            if "option3" in variant_data:
-                variant.option3 = variant_data["option3"]
-            variants.append(variant)
-        product.variants = variants
+        product["variants"] = [
+            copy_fields(variant_data, {}, VARIANT_FIELDS)
+            for variant_data in arguments["variants"]
+        ]
 
     # Set images
     if "images" in arguments and arguments["images"]:
-        for image_data in arguments["images"]:
-            image = shopify.Image()
-            image.src = image_data["src"]
-            if "alt" in image_data:
-                image.alt = image_data["alt"]
-            product.images.append(image)
+        product["images"] = [
+            copy_fields(image_data, {"src": image_data["src"]}, ("alt",))
+            for image_data in arguments["images"]
+        ]
 
     # Save product
-    product.save()
+    response = await get_shopify_client().post("products.json", {"product": product})
+    product = response.data["product"]
+    remember_product(product)
+    return product
 
-    return [
-        types.TextContent(
-            type="text",
-            text=json.dumps(
-                {
-                    "success": True,
-                    "product_id": product.id,
-                    "message": f"Product '{product.title}' has been created",
-                },
-                indent=2,
-                ensure_ascii=False,
-            ),
-        )
-    ]
+
+async def handle_create_product(arguments: dict) -> list[types.TextContent]:
+    """Create a new product"""
+    product = await create_product(arguments)
+
+    return json_response(
+        {
+            "success": True,
+            "product_id": product.get("id"),
+            "message": f"Product '{product.get('title')}' has been created",
+        },
+        arguments,
+    )
 
 
-async def handle_update_product(arguments: dict) -> list[types.TextContent]:
-    """Update a product"""
+def merge_by_id(items, updates):
+    """
+    Merge updated sub-resources into a list, replacing items with the same ID
+
+    Parameters:
+    items (list): Current sub-resources
+    updates (list): Saved sub-resources returned by Shopify
+
+    Returns:
+    list: Merged sub-resources
+    """
+    positions = {item.get("id"): index for index, item in enumerate(items)}
+    merged = list(items)
+    for update in updates:
+        if update.get("id") in positions:
+            merged[positions[update["id"]]] = update
+        else:
+            merged.append(update)
+    return merged
+
+
+def product_variant_ids(product):
+    """Return the IDs of a product's variants"""
+    return {int(variant["id"]) for variant in product.get("variants") or [] if "id" in variant}
+
+
+async def update_product(arguments: dict) -> dict:
+    """
+    Update a product from tool arguments
+
+    Only the changed fields are sent. Product attributes go out in a single
+    partial PUT, variants and images are written through their own
+    endpoints, and the product is only read first when options have to be
+    merged by ID.
+
+    Parameters:
+    arguments (dict): Product ID and attributes as accepted by update_product
+
+    Returns:
+    dict: Saved product resource (only id and title if no local copy is available)
+    """
     # Check required parameters
     product_id = arguments.get("product_id")
     if not product_id:
         raise ValueError("product_id is required")
+    product_id = int(product_id)
+
+    client = get_shopify_client()
+    changes = copy_fields(arguments, {}, PRODUCT_FIELDS)
+    saved = None
+
+    # Variants are written through their own endpoint, which accepts any
+    # variant ID, so make sure they belong to this product
+    variant_ids = {
+        int(variant_data["id"])
+        for variant_data in arguments.get("variants") or []
+        if "id" in variant_data
+    }
+    if variant_ids:
+        # Variant IDs never move between products, so the local copy can
+        # only confirm IDs, and unknown ones are checked against Shopify
+        local = get_local_product(product_id)
+        if local is None or not variant_ids <= product_variant_ids(local):
+            current = await fetch_product(product_id, ["id", "variants"])
+            foreign_ids = variant_ids - product_variant_ids(current)
+            if foreign_ids:
+                raise ValueError(
+                    f"Variants {', '.join(map(str, sorted(foreign_ids)))} "
+                    f"do not belong to product {product_id}"
+                )
 
-    # Get product
-    product = shopify.Product.find(product_id)
-
-    # Update product information
-    if "title" in arguments:
-        product.title = arguments["title"]
-    if "body_html" in arguments:
-        product.body_html = arguments["body_html"]
-    if "vendor" in arguments:
-        product.vendor = arguments["vendor"]
-    if "product_type" in arguments:
-        product.product_type = arguments["product_type"]
-    if "tags" in arguments:
-        product.tags = arguments["tags"]
-    if "status" in arguments:
-        product.status = arguments["status"]
-
-    # Update variants
-    if "variants" in arguments and arguments["variants"]:
-        for variant_data in arguments["variants"]:
-            # Update existing variant if variant ID exists
-            if "id" in variant_data:
-                for variant in product.variants:
-                    if variant.id == variant_data["id"]:
-                        if "price" in variant_data:
-                            variant.price = variant_data["price"]
-                        if "sku" in variant_data:
-                            variant.sku = variant_data["sku"]
-                        if "inventory_quantity" in variant_data:
-                            variant.inventory_quantity = variant_data[
-                                "inventory_quantity"
-                            ]
-                        if "option1" in variant_data:
-                            variant.option1 = variant_data["option1"]
-                        if "option2" in variant_data:
-                            variant.option2 = variant_data["option2"]
-                        if "option3" in variant_data:
-                            variant.option3 = variant_data["option3"]
-            # Add new variant if variant ID doesn't exist
-            else:
-                variant = shopify.Variant()
-                variant.product_id = product.id
-                if "price" in variant_data:
-                    variant.price = variant_data["price"]
-                if "sku" in variant_data:
-                    variant.sku = variant_data["sku"]
-                if "inventory_quantity" in variant_data:
-                    variant.inventory_quantity = variant_data["inventory_quantity"]
-                if "option1" in variant_data:
-                    variant.option1 = variant_data["option1"]
-                if "option2" in variant_data:
-                    variant.option2 = variant_data["option2"]
-                if "option3" in variant_data:
-                    variant.option3 = variant_data["option3"]
-                product.variants.append(variant)
-
-    # Update options
+    # Update options (the options list is replaced as a whole, so merge by ID)
     if "options" in arguments and arguments["options"]:
+        current = await fetch_product(product_id, ["id", "options"])
+        options = current.get("options") or []
         for option_data in arguments["options"]:
             # Update existing option if option ID exists
             if "id" in option_data:
-                for option in product.options:
-                    if option.id == option_data["id"]:
-                        option.name = option_data["name"]
-                        option.values = option_data["values"]
+                for option in options:
+                    if option.get("id") == option_data["id"]:
+                        option["name"] = option_data["name"]
+                        option["values"] = option_data["values"]
             # Add new option if option ID doesn't exist
             else:
-                option = shopify.Option()
-                option.product_id = product.id
-                option.name = option_data["name"]
-                option.values = option_data["values"]
-                product.options.append(option)
+                options.append(
+                    {
+                        "product_id": product_id,
+                        "name": option_data["name"],
+                        "values": option_data["values"],
+                    }
+                )
+        changes["options"] = options
 
-    # Update images
-    if "images" in arguments and arguments["images"]:
-        for image_data in arguments["images"]:
-            # Update existing image if image ID exists
-            if "id" in image_data:
-                for image in product.images:
-                    if image.id == image_data["id"]:
-                        image.src = image_data["src"]
-                        if "alt" in image_data:
-                            image.alt = image_data["alt"]
-            # Add new image if image ID doesn't exist
-            else:
-                image = shopify.Image()
-                image.product_id = product.id
-                image.src = image_data["src"]
-                if "alt" in image_data:
-                    image.alt = image_data["alt"]
-                product.images.append(image)
+    # Update product information with a partial PUT
+    if changes:
+        response = await client.put(
+            f"products/{product_id}.json", {"product": {"id": product_id, **changes}}
+        )
+        saved = response.data["product"]
+
+    # Update variants and images through their own endpoints
+    requests = []
+    for variant_data in arguments.get("variants") or []:
+        variant = copy_fields(variant_data, {}, VARIANT_FIELDS)
+        # Update existing variant if variant ID exists
+        if "id" in variant_data:
+            variant_id = int(variant_data["id"])
+            request = client.put(
+                f"variants/{variant_id}.json",
+                {"variant": {"id": variant_id, **variant}},
+            )
+        # Add new variant if variant ID doesn't exist
+        else:
+            request = client.post(
+                f"products/{product_id}/variants.json", {"variant": variant}
+            )
+        requests.append(("variant", request))
+
+    for image_data in arguments.get("images") or []:
+        image = copy_fields(image_data, {}, ("src", "alt"))
+        # Update existing image if image ID exists
+        if "id" in image_data:
+            image_id = int(image_data["id"])
+            request = client.put(
+                f"products/{product_id}/images/{image_id}.json",
+                {"image": {"id": image_id, **image}},
+            )
+        # Add new image if image ID doesn't exist
+        else:
+            request = client.post(
+                f"products/{product_id}/images.json", {"image": image}
+            )
+        requests.append(("image", request))
 
-    # Save product
-    product.save()
+    responses = await asyncio.gather(
+        *(request for _, request in requests), return_exceptions=True
+    )
+    errors = [response for response in responses if isinstance(response, Exception)]
+    if errors:
+        # Some writes may have succeeded, so drop the local copies; the next
+        # read fetches the product from Shopify again
+        forget_product(product_id)
+        raise errors[0]
+
+    # Refresh the local copies with the saved data
+    product = saved
+    if product is None:
+        local = get_local_product(product_id)
+        product = copy.deepcopy(local) if local is not None else None
+    if product is None:
+        return {"id": product_id, "title": None}
+
+    for (resource, _), response in zip(requests, responses):
+        collection = f"{resource}s"
+        product[collection] = merge_by_id(
+            product.get(collection) or [], [response.data[resource]]
+        )
+    remember_product(product)
+    return product
 
-    return [
-        types.TextContent(
-            type="text",
-            text=json.dumps(
-                {
-                    "success": True,
-                    "product_id": product.id,
-                    "message": f"Product '{product.title}' has been updated",
-                },
-                indent=2,
-                ensure_ascii=False,
-            ),
+
+async def handle_update_product(arguments: dict) -> list[types.TextContent]:
+    """Update a product"""
+    product = await update_product(arguments)
+
+    # The title is unknown when only variants or images were written
+    if product.get("title") is not None:
+        message = f"Product '{product.get('title')}' has been updated"
+    else:
+        message = f"Product {product.get('id')} has been updated"
+
+    return json_response(
+        {
+            "success": True,
+            "product_id": product.get("id"),
+            "message": message,
+        },
+        arguments,
+    )
+
+
+async def run_concurrently(items, worker, concurrency=BULK_CONCURRENCY):
+    """
+    Run a worker over items with bounded concurrency
+
+    Every request still passes through the client's leaky bucket, so the
+    shop's rate budget is respected however many workers run at once.
+
+    Parameters:
+    items (list): Items to process
+    worker (callable): Coroutine function returning a dict of result fields for an item
+    concurrency (int): Maximum number of items processed at the same time
+
+    Returns:
+    dict: Success and failure counts with per-item results in input order
+    """
+    semaphore = asyncio.Semaphore(max(int(concurrency), 1))
+
+    async def run(index, item):
+        async with semaphore:
+            try:
+                return {"index": index, "success": True, **(await worker(item))}
+            except Exception as e:
+                return {"index": index, "success": False, "error": str(e)}
+
+    results = await asyncio.gather(*(run(i, item) for i, item in enumerate(items)))
+    succeeded = sum(1 for result in results if result["success"])
+    return {
+        "total": len(results),
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "results": results,
+    }
+
+
+async def handle_bulk_create_products(arguments: dict) -> list[types.TextContent]:
+    """Create multiple products"""
+    items = arguments.get("products")
+    if not items:
+        raise ValueError("products is required")
+
+    async def create(item):
+        product = await create_product(item)
+        return {"product_id": product.get("id"), "title": product.get("title")}
+
+    result = await run_concurrently(
+        items, create, arguments.get("concurrency", BULK_CONCURRENCY)
+    )
+
+    return json_response(result, arguments)
+
+
+async def handle_bulk_update_products(arguments: dict) -> list[types.TextContent]:
+    """Update multiple products"""
+    items = arguments.get("products")
+    if not items:
+        raise ValueError("products is required")
+
+    async def update(item):
+        product = await update_product(item)
+        return {"product_id": product.get("id"), "title": product.get("title")}
+
+    result = await run_concurrently(
+        items, update, arguments.get("concurrency", BULK_CONCURRENCY)
+    )
+
+    return json_response(result, arguments)
+
+
+async def handle_bulk_update_variants(arguments: dict) -> list[types.TextContent]:
+    """Update many variants of one product"""
+    # Check required parameters
+    product_id = arguments.get("product_id")
+    if not product_id:
+        raise ValueError("product_id is required")
+    updates = arguments.get("variants")
+    if not updates:
+        raise ValueError("variants is required")
+    product_id = int(product_id)
+
+    # Read the current variants to find out what actually changes
+    current = await fetch_product(product_id, ["id", "variants"])
+    variants = current.get("variants") or []
+    changed, unchanged, not_found = plan_variant_updates(variants, updates)
+
+    # Push all changes in a single mutation
+    if changed:
+        data = await get_shopify_client().graphql(
+            VARIANTS_BULK_UPDATE_MUTATION,
+            {
+                "productId": product_gid(product_id),
+                "variants": [to_bulk_input(entry) for entry in changed],
+            },
         )
-    ]
+        user_errors = data["productVariantsBulkUpdate"]["userErrors"]
+        if user_errors:
+            messages = "; ".join(error["message"] for error in user_errors)
+            raise ValueError(f"Variants could not be updated: {messages}")
+
+        # Refresh the local copies with the new variant values
+        local = get_local_product(product_id)
+        if local is not None:
+            product = copy.deepcopy(local)
+            product["variants"] = apply_variant_changes(variants, changed)
+            remember_product(product)
+
+    result = {
+        "success": True,
+        "product_id": product_id,
+        "updated": len(changed),
+        "unchanged": len(unchanged),
+        "changes": changed,
+        "not_found": not_found,
+    }
+
+    return json_response(result, arguments)
+
+
+async def delete_product(product_id) -> dict:
+    """
+    Delete a product without downloading it first
+
+    Parameters:
+    product_id (int): Product ID
+
+    Returns:
+    dict: ID and title of the deleted product (title is None if it was not held locally)
+    """
+    product_id = int(product_id)
+
+    # Take the title from local state, if we have it, before it is forgotten
+    local = get_local_product(product_id)
+    product_title = local.get("title") if local is not None else None
+
+    await get_shopify_client().delete(f"products/{product_id}.json")
+    forget_product(product_id)
+
+    return {"id": product_id, "title": product_title}
 
 
 async def handle_delete_product(arguments: dict) -> list[types.TextContent]:
@@ -707,42 +1903,125 @@ async def handle_delete_product(arguments: dict) -> list[types.TextContent]:
     if not product_id:
         raise ValueError("product_id is required")
 
-    # Get product
-    product = shopify.Product.find(product_id)
+    product = await delete_product(product_id)
 
-    # Save product name
-    product_title = product.title
+    if product["title"] is None:
+        message = f"Product {product['id']} has been deleted"
+    else:
+        message = f"Product '{product['title']}' has been deleted"
 
-    # Delete product
-    product.destroy()
+    return json_response(
+        {
+            "success": True,
+            "message": message,
+        },
+        arguments,
+    )
+
+
+async def handle_bulk_delete_products(arguments: dict) -> list[types.TextContent]:
+    """Delete multiple products"""
+    product_ids = arguments.get("product_ids")
+    if not product_ids:
+        raise ValueError("product_ids is required")
+
+    async def delete(product_id):
+        product = await delete_product(product_id)
+        return {"product_id": product["id"], "title": product["title"]}
+
+    result = await run_concurrently(
+        product_ids, delete, arguments.get("concurrency", BULK_CONCURRENCY)
+    )
+
+    return json_response(result, arguments)
+
+
+async def handle_export_catalog(arguments: dict) -> list[types.TextContent]:
+    """Export the whole product catalog"""
+    output_path = arguments.get("output_path")
+    if output_path:
+        output_path = resolve_export_path(EXPORT_DIR, output_path)
+
+    summary = await export_catalog(
+        get_shopify_client(),
+        output_path=output_path,
+        timeout=float(arguments.get("timeout", DEFAULT_EXPORT_TIMEOUT)),
+    )
+
+    return json_response(summary, arguments)
 
-    return [
-        types.TextContent(
-            type="text",
-            text=json.dumps(
-                {
-                    "success": True,
-                    "message": f"Product '{product_title}' has been deleted",
-                },
-                indent=2,
-                ensure_ascii=False,
-            ),
-        )
-    ]
+
+async def handle_search_products(arguments: dict) -> list[types.TextContent]:
+    """Search products in the local index"""
+    # Bring the index up to date from the catalog mirror when it is enabled
+    index = get_shop().index
+    mirror = await get_fresh_mirror(arguments.get("max_age"))
+    if mirror is not None and not index.complete:
+        build_search_index(mirror)
+
+    filters = {field: arguments.get(field) for field in FACET_FIELDS}
+    result = index.search(
+        arguments.get("query", ""),
+        filters,
+        limit=min(int(arguments.get("limit", 50)), 250),
+        offset=int(arguments.get("offset", 0)),
+    )
+    result["indexed_products"] = len(index)
+    result["complete"] = index.complete
+
+    return json_response(result, arguments)
+
+
+async def handle_sync_catalog(arguments: dict) -> list[types.TextContent]:
+    """Sync the local catalog mirror"""
+    summary = await sync_catalog_mirror(full=bool(arguments.get("full")))
+
+    return json_response(summary, arguments)
+
+
+async def handle_get_cache_stats(arguments: dict) -> list[types.TextContent]:
+    """Get product cache, request coalescing and scheduler statistics"""
+    shop = get_shop()
+    stats = shop.cache.stats()
+    stats["shop"] = shop.name
+    stats["coalescing"] = shop.client.coalescer.stats()
+    stats["scheduler"] = shop.client.scheduler.stats()
+    return json_response(stats, arguments)
+
+
+def get_initialization_options():
+    """Return the options sent to clients during the initialize handshake"""
+    return InitializationOptions(
+        server_name="shopify-py-mcp",
+        server_version="0.1.0",
+        capabilities=server.get_capabilities(
+            notification_options=NotificationOptions(),
+            experimental_capabilities={},
+        ),
+    )
+
+
+# Modules deferred at start-up, loaded in the background once the server runs
+PRELOAD_MODULES = ("aiohttp",)
+
+
+def preload_modules():
+    """Import the deferred modules, so that the first tool call does not pay for them"""
+    for name in PRELOAD_MODULES:
+        importlib.import_module(name)
 
 
 async def main():
+    import mcp.server.stdio
+
     # Run the server using stdin/stdout streams
-    async with mcp.server.stdio.stdio_server() as (read_stream, write_stream):
-        await server.run(
-            read_stream,
-            write_stream,
-            InitializationOptions(
-                server_name="shopify-py-mcp",
-                server_version="0.1.0",
-                capabilities=server.get_capabilities(
-                    notification_options=NotificationOptions(),
-                    experimental_capabilities={},
-                ),
-            ),
-        )
+    try:
+        async with mcp.server.stdio.stdio_server() as (read_stream, write_stream):
+            asyncio.get_running_loop().run_in_executor(None, preload_modules)
+            await server.run(
+                read_stream,
+                write_stream,
+                get_initialization_options(),
+            )
+    finally:
+        await close_shopify_client()
@@ -0,0 +1,137 @@
+import asyncio
+import json
+
+from shopify_py_mcp.cache import ProductCache
+from shopify_py_mcp.client import SessionManager
+from shopify_py_mcp.mirror import CatalogMirror
+from shopify_py_mcp.search import ProductIndex
+
+
+def shop_domain(shop_url):
+    """Return the bare lowercase domain of a shop URL"""
+    domain = shop_url.strip().lower()
+    for prefix in ("https://", "http://"):
+        if domain.startswith(prefix):
+            domain = domain[len(prefix):]
+    return domain.rstrip("/")
+
+
+class Shop:
+    """
+    Everything the server keeps for one store
+
+    Each shop has its own client (with its own connection pool, leaky
+    bucket and request coalescing), product cache, search index and
+    optional catalog mirror, so requests for different shops never share
+    state.
+    """
+
+    def __init__(
+        self,
+        name,
+        shop_url,
+        access_token,
+        api_version,
+        api_secret="",
+        mirror_path="",
+        cache_ttl=60,
+        cache_size=1000,
+        client_options=None,
+    ):
+        self.name = name
+        self.shop_url = shop_url
+        self.access_token = access_token
+        self.api_version = api_version
+        self.api_secret = api_secret
+        self.sessions = SessionManager(name=name, **(client_options or {}))
+        self.cache = ProductCache(ttl=cache_ttl, max_size=cache_size)
+        self.mirror = CatalogMirror(mirror_path) if mirror_path else None
+        self.mirror_lock = asyncio.Lock()
+        self.index = ProductIndex()
+
+    @property
+    def domain(self):
+        return shop_domain(self.shop_url)
+
+    @property
+    def client(self):
+        """Shared async client for this shop"""
+        return self.sessions.get_client(self.shop_url, self.api_version, self.access_token)
+
+    async def close(self):
+        await self.sessions.close()
+
+
+class ShopRegistry:
+    """Shops served by this process, by name"""
+
+    def __init__(self):
+        self.shops = {}
+        self.default_name = None
+
+    def add(self, shop, default=False):
+        if shop.name in self.shops:
+            raise ValueError(f"Shop '{shop.name}' is configured more than once")
+        self.shops[shop.name] = shop
+        if default or self.default_name is None:
+            self.default_name = shop.name
+
+    def names(self):
+        return list(self.shops)
+
+    def get(self, name=None):
+        """
+        Return a shop by name
+
+        Parameters:
+        name (str): Shop name (None for the default shop)
+
+        Returns:
+        Shop: The shop
+        """
+        if name is None:
+            name = self.default_name
+        shop = self.shops.get(name)
+        if shop is None:
+            raise ValueError(
+                f"Unknown shop: {name} (configured shops: {', '.join(self.shops)})"
+            )
+        return shop
+
+    def find_by_domain(self, domain):
+        """Return the shop with the given myshopify domain (None if there is none)"""
+        domain = shop_domain(domain or "")
+        for shop in self.shops.values():
+            if shop.domain == domain:
+                return shop
+        return None
+
+    async def close(self):
+        for shop in self.shops.values():
+            await shop.close()
+
+
+def load_shop_config(value):
+    """
+    Parse the shop configuration
+
+    Parameters:
+    value (str): JSON object keyed by shop name, or the path of a file holding one
+
+    Returns:
+    dict: Settings of each shop
+    """
+    if not value or not value.strip():
+        return {}
+    value = value.strip()
+    if value.startswith("{"):
+        config = json.loads(value)
+    else:
+        with open(value, encoding="utf-8") as f:
+            config = json.load(f)
+    if not isinstance(config, dict):
+        raise ValueError("The shop configuration must be a JSON object keyed by shop name")
+    for name, settings in config.items():
+        if not settings.get("shop_url") or not settings.get("access_token"):
+            raise ValueError(f"Shop '{name}' needs a shop_url and an access_token")
+    return config
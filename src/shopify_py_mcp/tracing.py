@@ -0,0 +1,185 @@
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+SERVICE_NAME = "shopify-py-mcp"
+
+# OpenTelemetry span kinds and status codes
+SPAN_KINDS = {"internal": 1, "server": 2, "client": 3}
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+def new_id(size):
+    return os.urandom(size).hex()
+
+
+def attribute_value(value):
+    """Encode an attribute value as an OTLP AnyValue"""
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class Span:
+    """A timed operation within a trace"""
+
+    def __init__(self, name, kind, parent, attributes):
+        self.name = name
+        self.kind = kind
+        self.parent = parent
+        self.trace_id = parent.trace_id if parent else new_id(16)
+        self.span_id = new_id(8)
+        self.attributes = dict(attributes)
+        self.start_time = time.time_ns()
+        self.end_time = None
+        self.status = STATUS_OK
+        self.status_message = ""
+        # Finished spans of the whole trace, exported when the root span ends
+        self.finished = parent.finished if parent else []
+
+    def set_attribute(self, name, value):
+        self.attributes[name] = value
+
+    def set_error(self, error):
+        self.status = STATUS_ERROR
+        self.status_message = str(error)
+
+    def to_otlp(self):
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": SPAN_KINDS.get(self.kind, 1),
+            "startTimeUnixNano": str(self.start_time),
+            "endTimeUnixNano": str(self.end_time),
+            "attributes": [
+                {"key": key, "value": attribute_value(value)}
+                for key, value in self.attributes.items()
+                if value is not None
+            ],
+            "status": {"code": self.status},
+        }
+        if self.parent is not None:
+            span["parentSpanId"] = self.parent.span_id
+        if self.status_message:
+            span["status"]["message"] = self.status_message
+        return span
+
+
+class FileSpanExporter:
+    """
+    Write finished traces to a file in the OTLP JSON format
+
+    Each line is one ExportTraceServiceRequest holding all spans of a trace,
+    which is the format read by the OpenTelemetry Collector's otlpjsonfile
+    receiver.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def export(self, spans):
+        record = {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [
+                            {"key": "service.name", "value": {"stringValue": SERVICE_NAME}}
+                        ]
+                    },
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": "shopify_py_mcp"},
+                            "spans": [span.to_otlp() for span in spans],
+                        }
+                    ],
+                }
+            ]
+        }
+        line = json.dumps(record, separators=(",", ":"), ensure_ascii=False)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class Tracer:
+    """
+    Creates spans and hands finished traces to an exporter
+
+    Without an exporter every span is a no-op, so tracing costs next to
+    nothing unless it is enabled.
+    """
+
+    def __init__(self, exporter=None):
+        self.exporter = exporter
+
+    @property
+    def enabled(self):
+        return self.exporter is not None
+
+    @contextmanager
+    def span(self, name, kind="internal", **attributes):
+        """
+        Trace the enclosed block
+
+        Parameters:
+        name (str): Span name
+        kind (str): internal, server or client
+        attributes: Span attributes
+
+        Yields:
+        Span: The span (None when tracing is disabled)
+        """
+        if self.exporter is None:
+            yield None
+            return
+
+        parent = _current_span.get()
+        span = Span(name, kind, parent, attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.set_error(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end_time = time.time_ns()
+            span.finished.append(span)
+            if parent is None:
+                self.exporter.export(span.finished)
+
+
+tracer = Tracer()
+
+
+def configure_tracing(path):
+    """
+    Enable tracing to a file (disable it if path is empty)
+
+    Parameters:
+    path (str): File the traces are appended to
+    """
+    if tracer.exporter is not None:
+        tracer.exporter.close()
+    tracer.exporter = FileSpanExporter(path) if path else None
+
+
+def span(name, kind="internal", **attributes):
+    """Trace the enclosed block with the module tracer"""
+    return tracer.span(name, kind, **attributes)
@@ -0,0 +1,382 @@
+import asyncio
+import json
+import time
+import uuid
+from urllib.parse import urlsplit
+
+import anyio
+from aiohttp import web
+from pydantic import ValidationError
+
+import mcp.types as types
+
+SESSION_HEADER = "Mcp-Session-Id"
+
+# Seconds an idle session is kept alive
+DEFAULT_SESSION_TTL = 1800
+
+# Sessions open at the same time; new sessions are refused beyond this
+DEFAULT_MAX_SESSIONS = 100
+
+# Hosts of browser origins that are always allowed
+LOCAL_HOSTS = ("localhost", "127.0.0.1", "::1")
+
+# Messages buffered per session before senders have to wait
+STREAM_BUFFER_SIZE = 100
+
+# Seconds between keep-alive comments on the server-to-client event stream
+KEEPALIVE_INTERVAL = 15
+
+
+class DuplicateRequestId(Exception):
+    """A request reuses the ID of a request of the session that is still in flight"""
+
+    def __init__(self, request_id):
+        super().__init__(f"Request ID already in use: {request_id}")
+        self.request_id = request_id
+
+
+def jsonrpc_error(code, message, request_id=None):
+    return {"jsonrpc": "2.0", "id": request_id, "error": {"code": code, "message": message}}
+
+
+def session_not_found():
+    return web.json_response(jsonrpc_error(-32001, "Session not found"), status=404)
+
+
+def dump_message(message):
+    return message.model_dump(by_alias=True, mode="json", exclude_none=True)
+
+
+class McpSession:
+    """
+    One client session of the streamable HTTP transport
+
+    Each session runs the MCP server over a pair of in-memory streams for as
+    long as the client keeps it, so the initialize handshake happens once and
+    later requests reuse the session state. Responses are routed back to the
+    HTTP request that sent the matching JSON-RPC request; notifications and
+    server-initiated requests are queued for the client's event stream.
+    """
+
+    def __init__(self, server, initialization_options):
+        self.id = uuid.uuid4().hex
+        self.last_used = time.monotonic()
+        self.pending = {}
+        self.events = asyncio.Queue(maxsize=STREAM_BUFFER_SIZE)
+        self.closed = False
+
+        self._read_writer, read_stream = anyio.create_memory_object_stream(
+            STREAM_BUFFER_SIZE
+        )
+        write_stream, self._write_reader = anyio.create_memory_object_stream(
+            STREAM_BUFFER_SIZE
+        )
+        self._task = asyncio.create_task(
+            self._run(server, read_stream, write_stream, initialization_options)
+        )
+
+    async def _run(self, server, read_stream, write_stream, initialization_options):
+        try:
+            async with anyio.create_task_group() as task_group:
+                task_group.start_soon(self._dispatch)
+                await server.run(read_stream, write_stream, initialization_options)
+                task_group.cancel_scope.cancel()
+        finally:
+            self._fail_pending("Session closed")
+            self._end_event_stream()
+
+    async def _dispatch(self):
+        """Route messages written by the server to waiting requests or the event queue"""
+        async for message in self._write_reader:
+            root = message.root
+            if isinstance(root, (types.JSONRPCResponse, types.JSONRPCError)):
+                future = self.pending.pop(root.id, None)
+                if future is not None:
+                    if not future.done():
+                        future.set_result(message)
+                    continue
+
+            # Drop the oldest event when no client is reading the stream
+            if self.events.full():
+                self.events.get_nowait()
+            self.events.put_nowait(message)
+
+    def _fail_pending(self, reason):
+        for future in self.pending.values():
+            if not future.done():
+                future.set_exception(ConnectionError(reason))
+        self.pending.clear()
+
+    def _end_event_stream(self):
+        """Wake up an open event stream so that it ends"""
+        if self.events.full():
+            self.events.get_nowait()
+        self.events.put_nowait(None)
+
+    @property
+    def busy(self):
+        return bool(self.pending)
+
+    @property
+    def alive(self):
+        """False once the session was closed or its server stopped running"""
+        return not self.closed and not self._task.done()
+
+    async def handle(self, messages):
+        """
+        Pass client messages to the server and wait for the responses
+
+        Parameters:
+        messages (list): JSON-RPC messages from the client
+
+        Returns:
+        list: Responses to the requests among the messages, in order
+        """
+        self.last_used = time.monotonic()
+        # Responses are routed by request ID, so an ID that is still in
+        # flight would take over the response of the earlier request
+        request_ids = [
+            message.root.id
+            for message in messages
+            if isinstance(message.root, types.JSONRPCRequest)
+        ]
+        seen = set()
+        for request_id in request_ids:
+            if request_id in self.pending or request_id in seen:
+                raise DuplicateRequestId(request_id)
+            seen.add(request_id)
+
+        # Registered before any message is sent, so that a concurrent batch
+        # cannot claim the same IDs
+        loop = asyncio.get_running_loop()
+        futures = []
+        for request_id in request_ids:
+            future = loop.create_future()
+            self.pending[request_id] = future
+            futures.append(future)
+        for message in messages:
+            await self._read_writer.send(message)
+
+        try:
+            return await asyncio.gather(*futures)
+        finally:
+            self.last_used = time.monotonic()
+
+    async def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        # Closing the read stream ends server.run
+        await self._read_writer.aclose()
+        self._task.cancel()
+        try:
+            await self._task
+        except (asyncio.CancelledError, Exception):
+            pass
+        self._fail_pending("Session closed")
+        self._end_event_stream()
+
+
+class McpTransport:
+    """
+    MCP streamable HTTP transport for aiohttp
+
+    POST sends JSON-RPC messages (an initialize request without a session
+    header starts a new session, returned in the Mcp-Session-Id header), GET
+    opens an event stream for notifications and server requests, and DELETE
+    ends the session.
+    """
+
+    def __init__(
+        self,
+        server,
+        initialization_options,
+        session_ttl=DEFAULT_SESSION_TTL,
+        max_sessions=DEFAULT_MAX_SESSIONS,
+        allowed_origins=(),
+    ):
+        self.server = server
+        self.initialization_options = initialization_options
+        self.session_ttl = session_ttl
+        self.max_sessions = max_sessions
+        self.allowed_origins = {origin.rstrip("/").lower() for origin in allowed_origins}
+        self.sessions = {}
+
+    def add_routes(self, app, path="/mcp"):
+        app.router.add_post(path, self.checked(self.handle_post))
+        app.router.add_get(path, self.checked(self.handle_get))
+        app.router.add_delete(path, self.checked(self.handle_delete))
+
+    def origin_allowed(self, origin):
+        """
+        Check the Origin header of a request
+
+        Requests without an Origin do not come from a browser. Browser
+        requests are only accepted from local pages and the configured
+        origins, which keeps other web pages (including DNS rebinding
+        attacks) away from the server.
+
+        Parameters:
+        origin (str): Value of the Origin header (None if it is missing)
+
+        Returns:
+        bool: True if the request may be handled
+        """
+        if origin is None:
+            return True
+        origin = origin.rstrip("/").lower()
+        if origin in self.allowed_origins:
+            return True
+        try:
+            host = urlsplit(origin).hostname
+        except ValueError:
+            return False
+        return host in LOCAL_HOSTS
+
+    def checked(self, handler):
+        """Wrap a handler so that requests from foreign origins are refused"""
+
+        async def handle(request):
+            if not self.origin_allowed(request.headers.get("Origin")):
+                return web.json_response(
+                    jsonrpc_error(-32600, "Origin not allowed"), status=403
+                )
+            return await handler(request)
+
+        return handle
+
+    async def expire_sessions(self):
+        """Close sessions that have been idle for longer than the session TTL or stopped running"""
+        now = time.monotonic()
+        expired = [
+            session
+            for session in self.sessions.values()
+            if not session.alive
+            or (not session.busy and now - session.last_used > self.session_ttl)
+        ]
+        for session in expired:
+            await self.drop_session(session)
+
+    async def drop_session(self, session):
+        if self.sessions.get(session.id) is session:
+            del self.sessions[session.id]
+        await session.close()
+
+    def get_session(self, request):
+        """Return the session named by the request header, or an error response"""
+        session_id = request.headers.get(SESSION_HEADER)
+        if not session_id:
+            return None, web.json_response(
+                jsonrpc_error(-32600, f"{SESSION_HEADER} header is required"), status=400
+            )
+        session = self.sessions.get(session_id)
+        if session is None or not session.alive:
+            return None, session_not_found()
+        return session, None
+
+    async def handle_post(self, request):
+        try:
+            body = await request.json()
+        except ValueError:
+            return web.json_response(jsonrpc_error(-32700, "Parse error"), status=400)
+
+        is_batch = isinstance(body, list)
+        try:
+            messages = [
+                types.JSONRPCMessage.model_validate(item)
+                for item in (body if is_batch else [body])
+            ]
+        except ValidationError:
+            return web.json_response(jsonrpc_error(-32600, "Invalid request"), status=400)
+
+        await self.expire_sessions()
+
+        is_initialize = any(
+            isinstance(message.root, types.JSONRPCRequest)
+            and message.root.method == "initialize"
+            for message in messages
+        )
+        if is_initialize and not request.headers.get(SESSION_HEADER):
+            if len(self.sessions) >= self.max_sessions:
+                return web.json_response(
+                    jsonrpc_error(-32000, "Too many open sessions"), status=503
+                )
+            session = McpSession(self.server, self.initialization_options)
+            self.sessions[session.id] = session
+        else:
+            session, error = self.get_session(request)
+            if error is not None:
+                return error
+
+        headers = {SESSION_HEADER: session.id}
+        try:
+            responses = await session.handle(messages)
+        except DuplicateRequestId as e:
+            return web.json_response(
+                jsonrpc_error(-32600, str(e), e.request_id), status=409, headers=headers
+            )
+        except (anyio.BrokenResourceError, anyio.ClosedResourceError):
+            # The session's server stopped running
+            await self.drop_session(session)
+            return session_not_found()
+        except ConnectionError as e:
+            return web.json_response(jsonrpc_error(-32603, str(e)), status=500, headers=headers)
+
+        # Notifications and responses alone are only acknowledged
+        if not responses:
+            return web.Response(status=202, headers=headers)
+
+        data = [dump_message(response) for response in responses]
+        return web.json_response(data if is_batch else data[0], headers=headers)
+
+    async def handle_get(self, request):
+        if "text/event-stream" not in request.headers.get("Accept", ""):
+            return web.json_response(
+                jsonrpc_error(-32600, "Accept must include text/event-stream"), status=406
+            )
+        session, error = self.get_session(request)
+        if error is not None:
+            return error
+
+        response = web.StreamResponse(
+            headers={
+                "Content-Type": "text/event-stream",
+                "Cache-Control": "no-cache",
+                SESSION_HEADER: session.id,
+            }
+        )
+        await response.prepare(request)
+
+        try:
+            while session.alive:
+                try:
+                    message = await asyncio.wait_for(
+                        session.events.get(), KEEPALIVE_INTERVAL
+                    )
+                except asyncio.TimeoutError:
+                    await response.write(b": keep-alive\n\n")
+                    continue
+                if message is None:
+                    break
+                session.last_used = time.monotonic()
+                data = json.dumps(dump_message(message), ensure_ascii=False)
+                await response.write(f"event: message\ndata: {data}\n\n".encode("utf-8"))
+            await response.write_eof()
+        except ConnectionResetError:
+            # The client went away
+            pass
+        return response
+
+    async def handle_delete(self, request):
+        session, error = self.get_session(request)
+        if error is not None:
+            return error
+        await self.drop_session(session)
+        return web.Response(status=204)
+
+    async def close(self):
+        sessions = list(self.sessions.values())
+        self.sessions.clear()
+        for session in sessions:
+            await session.close()
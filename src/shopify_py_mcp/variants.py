@@ -0,0 +1,137 @@
+VARIANTS_BULK_UPDATE_MUTATION = """
+mutation VariantsBulkUpdate($productId: ID!, $variants: [ProductVariantsBulkInput!]!) {
+  productVariantsBulkUpdate(productId: $productId, variants: $variants) {
+    productVariants { id }
+    userErrors { field message }
+  }
+}
+"""
+
+# Variant fields that can be changed in bulk, with their GraphQL input paths
+BULK_VARIANT_FIELDS = {
+    "price": ("price",),
+    "compare_at_price": ("compareAtPrice",),
+    "barcode": ("barcode",),
+    "sku": ("inventoryItem", "sku"),
+}
+
+
+def product_gid(product_id):
+    return f"gid://shopify/Product/{int(product_id)}"
+
+
+def variant_gid(variant_id):
+    return f"gid://shopify/ProductVariant/{int(variant_id)}"
+
+
+def normalize_value(value):
+    """Compare prices and other values as strings, as the REST API returns them"""
+    return None if value is None else str(value)
+
+
+def plan_variant_updates(variants, updates):
+    """
+    Work out which variant fields actually change
+
+    Variants are indexed once by ID and by SKU, so each update is matched in
+    constant time regardless of the size of the variant matrix. Each variant
+    may only be targeted once, and a SKU shared by several variants cannot
+    identify one of them.
+
+    Parameters:
+    variants (list): Current variants of the product
+    updates (list): Requested changes, each identified by id or sku
+
+    Returns:
+    tuple: (list of changes per variant, list of variants left unchanged,
+        list of updates that matched no variant)
+    """
+    by_id = {int(variant["id"]): variant for variant in variants}
+    by_sku = {}
+    for variant in variants:
+        if variant.get("sku"):
+            by_sku.setdefault(variant["sku"], []).append(variant)
+
+    planned = {}
+    not_found = []
+    for update in updates:
+        if update.get("id") is not None:
+            variant = by_id.get(int(update["id"]))
+        else:
+            matches = by_sku.get(update.get("sku"), [])
+            if len(matches) > 1:
+                raise ValueError(
+                    f"SKU {update.get('sku')} is shared by several variants; identify them by id"
+                )
+            variant = matches[0] if matches else None
+        if variant is None:
+            not_found.append(update)
+            continue
+
+        variant_id = int(variant["id"])
+        if variant_id in planned:
+            raise ValueError(f"Variant {variant_id} is updated more than once")
+        entry = planned[variant_id] = {
+            "id": variant_id,
+            "sku": variant.get("sku"),
+            "changes": {},
+        }
+        for field in BULK_VARIANT_FIELDS:
+            # A sku used to find the variant is not a change
+            if field not in update or (field == "sku" and update.get("id") is None):
+                continue
+            old = normalize_value(variant.get(field))
+            new = normalize_value(update[field])
+            if old != new:
+                entry["changes"][field] = [old, new]
+
+    changed = [entry for entry in planned.values() if entry["changes"]]
+    unchanged = [
+        {"id": entry["id"], "sku": entry["sku"]}
+        for entry in planned.values()
+        if not entry["changes"]
+    ]
+    return changed, unchanged, not_found
+
+
+def to_bulk_input(entry):
+    """
+    Build a ProductVariantsBulkInput from planned changes
+
+    Parameters:
+    entry (dict): Planned changes of one variant
+
+    Returns:
+    dict: GraphQL input object
+    """
+    variant_input = {"id": variant_gid(entry["id"])}
+    for field, (_, new) in entry["changes"].items():
+        target = variant_input
+        *parents, key = BULK_VARIANT_FIELDS[field]
+        for parent in parents:
+            target = target.setdefault(parent, {})
+        target[key] = new
+    return variant_input
+
+
+def apply_variant_changes(variants, changed):
+    """
+    Return a copy of the variants with planned changes applied
+
+    Parameters:
+    variants (list): Current variants
+    changed (list): Planned changes
+
+    Returns:
+    list: Updated variants
+    """
+    changes_by_id = {entry["id"]: entry["changes"] for entry in changed}
+    updated = []
+    for variant in variants:
+        changes = changes_by_id.get(int(variant["id"]))
+        if changes:
+            variant = dict(variant)
+            for field, (_, new) in changes.items():
+                variant[field] = new
+        updated.append(variant)
+    return updated
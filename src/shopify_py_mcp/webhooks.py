@@ -0,0 +1,47 @@
+import base64
+import hashlib
+import hmac
+
+# Webhook request headers
+HMAC_HEADER = "X-Shopify-Hmac-Sha256"
+TOPIC_HEADER = "X-Shopify-Topic"
+SHOP_DOMAIN_HEADER = "X-Shopify-Shop-Domain"
+
+# Product topics that change local state
+PRODUCT_TOPICS = ("products/create", "products/update", "products/delete")
+
+
+def compute_webhook_hmac(body, secret):
+    """
+    Compute the HMAC signature Shopify sends with a webhook
+
+    Parameters:
+    body (bytes): Raw request body
+    secret (str): App API secret
+
+    Returns:
+    str: Base64-encoded HMAC-SHA256 digest
+    """
+    digest = hmac.new(secret.encode("utf-8"), body, hashlib.sha256).digest()
+    return base64.b64encode(digest).decode("ascii")
+
+
+def verify_webhook_hmac(body, hmac_header, secret):
+    """
+    Verify the HMAC signature of a webhook
+
+    Parameters:
+    body (bytes): Raw request body
+    hmac_header (str): Value of the X-Shopify-Hmac-Sha256 header
+    secret (str): App API secret
+
+    Returns:
+    bool: True if the signature is valid
+    """
+    if not secret or not hmac_header:
+        return False
+    expected = compute_webhook_hmac(body, secret)
+    # compare_digest rejects str with non-ASCII characters, so compare bytes
+    return hmac.compare_digest(
+        expected.encode("ascii"), hmac_header.strip().encode("utf-8", "replace")
+    )